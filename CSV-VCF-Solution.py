@@ -1,10 +1,116 @@
+import time
+STARTUP_STARTED = time.perf_counter()  # Taken before the other imports so they count towards startup
+
 import tkinter as tk
 from tkinter import filedialog, ttk, messagebox, scrolledtext
-import pandas as pd # type: ignore
+import bisect
+import datetime
+import json
+import multiprocessing
 import os
-import re
-import csv
-from pathlib import Path
+import sys
+import threading
+import contextlib
+from csv_vcf_engine import (
+    ContactSearchIndex, DEFAULT_CONVERSION_WORKERS, DEFAULT_COUNTRY_CODE, FRAME_CACHE, FolderWatcher, OperationMetrics, PhoneIndex, ShardLimits,
+    PhoneNormalizer, compact_frame, convert_files_incremental, convert_files_parallel, default_metrics_log_path,
+    filter_frames, format_duration, make_contacts_frame, merge_csv_files_in_memory, merge_sort_key,
+    preload_heavy_modules, profile_call, profile_output_path, read_csv_files, read_frame_file, rename_frames,
+    sorted_merge_csv_files, stream_make_contacts, stream_merge_csv_files, write_frames,
+)
+
+# How often the GUI polls a running background job, in milliseconds
+JOB_POLL_INTERVAL_MS = 100
+# Rows fetched beyond each edge of the editor's visible window, so small scrolls are cheap
+TREE_BUFFER_ROWS = 50
+# Pause after the last keystroke in the editor's search box before searching, in milliseconds
+SEARCH_DELAY_MS = 200
+# When set to a file path, one JSON line of startup timings is appended to it on every start
+STARTUP_LOG_ENV = "CSV_VCF_STARTUP_LOG"
+# File dialog types for the Editor and Merger; Parquet and Arrow need pyarrow
+TABLE_OPEN_TYPES = [("Contact Tables", "*.csv *.parquet *.arrow *.feather"), ("CSV Files", "*.csv"),
+                    ("Parquet Files", "*.parquet"), ("Arrow Files", "*.arrow *.feather")]
+TABLE_SAVE_TYPES = [("CSV Files", "*.csv"), ("Parquet Files", "*.parquet"), ("Arrow Files", "*.arrow")]
+
+
+# Background jobs. Heavy operations run on a worker thread and only ever touch the
+# job object; the GUI polls it with after() to drive the progress bar and result
+# labels, so no Tk widget is used off the main thread.
+class JobCancelled(Exception):
+    pass
+
+
+class BackgroundJob:
+    def __init__(self, name, work, profile_path=None):
+        self.name = name
+        self.work = work
+        self.metrics = OperationMetrics(name)  # Passed by work to the engines it calls
+        self.profile_path = profile_path  # Run work under cProfile and save the stats here
+        self.lock = threading.Lock()
+        self.cancel_event = threading.Event()
+        self.done = 0
+        self.total = None
+        self.unit = "items"
+        self.started_at = None
+        self.finished = False
+        self.result = None
+        self.error = None
+
+    def start(self):
+        self.started_at = time.perf_counter()
+        threading.Thread(target=self.run, daemon=True).start()
+
+    def run(self):
+        self.metrics.start()
+        try:
+            if self.profile_path:
+                result = profile_call(self.profile_path, self.work, self)
+            else:
+                result = self.work(self)
+            with self.lock:
+                self.result = result
+        except BaseException as e:
+            with self.lock:
+                self.error = e
+        finally:
+            self.metrics.finish()
+            with self.lock:
+                self.finished = True
+
+    # Called from the worker thread; doubles as the cancellation checkpoint
+    def report(self, done, total=None, unit=None):
+        with self.lock:
+            self.done = done
+            self.total = total
+            if unit:
+                self.unit = unit
+        self.check_cancelled()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def check_cancelled(self):
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def fraction(self):
+        with self.lock:
+            return self.done / self.total if self.total else None
+
+    def progress_text(self):
+        with self.lock:
+            done, total, unit = self.done, self.total, self.unit
+        if not total:
+            # Open-ended jobs (the folder watcher) report a status rather than a unit, and a
+            # rate over time spent mostly waiting would mean nothing
+            return f"{done:,} {unit}"
+        elapsed = time.perf_counter() - self.started_at
+        rate = done / elapsed if elapsed > 0 else 0
+        text = f"{done:,} of {total:,} {unit}"
+        if rate:
+            text += f" - {rate:,.0f} {unit}/s - ETA {format_duration((total - done) / rate)}"
+        return text
+
 
 class CombinedCSVApp:
     def __init__(self, master):
@@ -19,6 +125,17 @@ class CombinedCSVApp:
         master.wm_iconphoto(True, icon_image)
 
         self.dfs = []  # List to hold multiple DataFrames for the editor
+        self.df_sources = []  # File each DataFrame in self.dfs was loaded from
+        self.tree_row_starts = []  # Global index of the first row of each DataFrame
+        self.tree_total_rows = 0
+        self.tree_offset = 0  # Global index of the first row shown in the editor
+        self.tree_cache = (0, [])  # (first row index, rows) around the visible window
+        self.tree_filter = None  # Global indexes of the rows matching the search, or None for all rows
+        self.search_index = None  # ContactSearchIndex over self.dfs
+        self.search_after = None  # Pending after() call for a typed search
+        self.maker_result = None  # (path, DataFrame) of the last CSV made in the CSV Maker tab
+        self.job = None  # The BackgroundJob currently running, if any
+        self.metrics_log_path = default_metrics_log_path()  # JSON lines, one per operation
         self.setup_ui()
 
     def setup_ui(self):
@@ -44,12 +161,30 @@ class CombinedCSVApp:
         self.notebook.add(self.converter_frame, text="CSV/VCF Converter")
         self.notebook.add(self.how_to_use_frame, text="How to Use")
 
-        # Setup each tab
-        self.setup_editor_tab()
-        self.setup_merger_tab()
-        self.setup_maker_merger_tab()
-        self.setup_converter_tab()
-        self.setup_how_to_use_tab()
+        # Tabs are built the first time they are selected, so only the first one delays startup
+        self.tab_builders = {
+            str(self.editor_frame): self.setup_editor_tab,
+            str(self.merger_frame): self.setup_merger_tab,
+            str(self.maker_merger_frame): self.setup_maker_merger_tab,
+            str(self.converter_frame): self.setup_converter_tab,
+            str(self.how_to_use_frame): self.setup_how_to_use_tab,
+        }
+        self.notebook.bind("<<NotebookTabChanged>>", lambda event: self.build_selected_tab())
+        self.build_selected_tab()
+
+        # Progress bar and cancel button shared by all background jobs
+        status_frame = ttk.Frame(self.master)
+        status_frame.pack(fill=tk.X, padx=10)
+        self.progress_bar = ttk.Progressbar(status_frame, mode="determinate", maximum=1.0)
+        self.progress_bar.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
+        self.btn_cancel_job = ttk.Button(status_frame, text="Cancel", command=self.cancel_job, state=tk.DISABLED)
+        self.btn_cancel_job.pack(side=tk.RIGHT)
+        self.profile_next_job_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(status_frame, text="Profile next run", variable=self.profile_next_job_var).pack(side=tk.RIGHT, padx=5)
+
+        # Timing summary of the last operation; the full record goes to the metrics log
+        self.metrics_label = ttk.Label(self.master, text="", style="Creator.TLabel", wraplength=860)
+        self.metrics_label.pack(fill=tk.X, padx=10)
 
         # Creator label
         creator_frame = ttk.Frame(self.master)
@@ -57,6 +192,11 @@ class CombinedCSVApp:
         creator_label = ttk.Label(creator_frame, text="Created by CamreshJames CNJM Technologies INC.", style="Creator.TLabel")
         creator_label.pack(side=tk.RIGHT)
 
+    def build_selected_tab(self):
+        setup_tab = self.tab_builders.pop(self.notebook.select(), None)
+        if setup_tab is not None:
+            setup_tab()
+
     def configure_styles(self):
         self.style.configure("TButton", padding=10, font=("Segoe UI", 11), background="#4A90E2", foreground="white")
         self.style.map("TButton", background=[('active', '#2980B9')])
@@ -67,11 +207,26 @@ class CombinedCSVApp:
         self.style.configure("TNotebook", background="#F0F4F8")
         self.style.configure("TNotebook.Tab", padding=[10, 5], font=("Segoe UI", 11))
         self.style.configure("Creator.TLabel", font=("Segoe UI", 9), foreground="#555")
+        self.style.configure("Error.TLabel", foreground="#D32F2F")
+        self.style.configure("Success.TLabel", foreground="#388E3C")
 
     def setup_editor_tab(self):
         # File selection
         ttk.Button(self.editor_frame, text="Load CSV Files", command=self.load_csv_files).pack(pady=10)
         
+        # Search box; the rows shown are filtered through the index built when loading
+        search_frame = ttk.Frame(self.editor_frame)
+        search_frame.pack(padx=10, fill=tk.X)
+        ttk.Label(search_frame, text="Search name or phone:").pack(side=tk.LEFT, padx=(0, 5))
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *args: self.schedule_search())
+        ttk.Entry(search_frame, textvariable=self.search_var, width=30).pack(side=tk.LEFT)
+        self.search_prefix_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(search_frame, text="Starts with", variable=self.search_prefix_var, command=self.apply_search).pack(side=tk.LEFT, padx=5)
+        ttk.Button(search_frame, text="Clear", command=lambda: self.search_var.set("")).pack(side=tk.LEFT)
+        self.search_result_label = ttk.Label(search_frame, text="")
+        self.search_result_label.pack(side=tk.LEFT, padx=10)
+
         # Treeview for displaying CSV contents
         tree_frame = ttk.Frame(self.editor_frame)
         tree_frame.pack(pady=10, padx=10, expand=True, fill=tk.BOTH)
@@ -79,27 +234,39 @@ class CombinedCSVApp:
         self.tree = ttk.Treeview(tree_frame, show="headings")
         self.tree.pack(side=tk.LEFT, expand=True, fill=tk.BOTH)
 
-        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.tree.configure(yscroll=scrollbar.set)
+        # The scrollbar moves a virtual row offset into the DataFrames instead of scrolling
+        # the Treeview, which only ever holds the rows that fit on screen
+        self.tree_scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.scroll_treeview)
+        self.tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<Configure>", lambda event: self.render_treeview())
+        self.tree.bind("<MouseWheel>", self.on_treeview_wheel)
+        self.tree.bind("<Button-4>", lambda event: self.scroll_treeview("scroll", -3, "units"))
+        self.tree.bind("<Button-5>", lambda event: self.scroll_treeview("scroll", 3, "units"))
 
         # Name change frame
         change_frame = ttk.Frame(self.editor_frame)
         change_frame.pack(pady=10, padx=10, fill=tk.X)
 
         ttk.Label(change_frame, text="New Name Prefix:").grid(row=0, column=0, padx=5, pady=5, sticky="e")
-        self.name_prefix_entry = ttk.Entry(change_frame, width=30)
-        self.name_prefix_entry.grid(row=0, column=1, padx=5, pady=5)
+        self.editor_name_prefix_entry = ttk.Entry(change_frame, width=30)
+        self.editor_name_prefix_entry.grid(row=0, column=1, padx=5, pady=5)
 
         ttk.Label(change_frame, text="Starting Index:").grid(row=0, column=2, padx=5, pady=5, sticky="e")
-        self.start_index_entry = ttk.Entry(change_frame, width=10)
-        self.start_index_entry.grid(row=0, column=3, padx=5, pady=5)
+        self.editor_start_index_entry = ttk.Entry(change_frame, width=10)
+        self.editor_start_index_entry.grid(row=0, column=3, padx=5, pady=5)
 
         ttk.Button(change_frame, text="Change Names", command=self.change_names).grid(row=0, column=4, padx=5, pady=5)
 
         # Save button
+        self.editor_compact_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.editor_frame, text="Compact memory (categorical and Arrow string columns)", variable=self.editor_compact_var).pack()
+        self.editor_dedup_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.editor_frame, text="Drop duplicate phone numbers when saving", variable=self.editor_dedup_var).pack()
         ttk.Button(self.editor_frame, text="Save Merged CSV", command=self.save_csv).pack(pady=10)
 
+        self.editor_result_label = ttk.Label(self.editor_frame, text="", wraplength=640, justify="center")
+        self.editor_result_label.pack(pady=(0, 10))
+
     def setup_merger_tab(self):
         label_instruction = ttk.Label(self.merger_frame, text="Select CSV files to merge:", style="TLabel")
         label_instruction.pack(pady=(10, 5))
@@ -110,6 +277,27 @@ class CombinedCSVApp:
         btn_select = ttk.Button(self.merger_frame, text="Select Files", command=self.select_files_for_merge)
         btn_select.pack(pady=(0, 10))
 
+        self.streaming_merge_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.merger_frame, text="Streaming merge (low memory, headers must match)", variable=self.streaming_merge_var).pack()
+        self.merger_dedup_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.merger_frame, text="Drop duplicate phone numbers", variable=self.merger_dedup_var).pack()
+
+        merger_sort_frame = ttk.Frame(self.merger_frame)
+        merger_sort_frame.pack()
+        self.merger_sort_var = tk.StringVar(value="")
+        ttk.Label(merger_sort_frame, text="Row order:").pack(side=tk.LEFT, padx=(0, 5))
+        ttk.Radiobutton(merger_sort_frame, text="As in the files", variable=self.merger_sort_var, value="").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(merger_sort_frame, text="Sorted by name", variable=self.merger_sort_var, value="name").pack(side=tk.LEFT, padx=5)
+        ttk.Radiobutton(merger_sort_frame, text="Sorted by phone", variable=self.merger_sort_var, value="phone").pack(side=tk.LEFT, padx=5)
+
+        merger_normalize_frame = ttk.Frame(self.merger_frame)
+        merger_normalize_frame.pack(pady=(0, 10))
+        self.merger_normalize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(merger_normalize_frame, text="Normalize numbers (E.164), country code:", variable=self.merger_normalize_var).pack(side=tk.LEFT, padx=(0, 5))
+        self.merger_country_code_entry = ttk.Entry(merger_normalize_frame, width=6)
+        self.merger_country_code_entry.pack(side=tk.LEFT)
+        self.merger_country_code_entry.insert(0, DEFAULT_COUNTRY_CODE)
+
         btn_merge = ttk.Button(self.merger_frame, text="Merge Files", command=self.merge_files)
         btn_merge.pack(pady=(0, 10))
 
@@ -146,7 +334,45 @@ class CombinedCSVApp:
         self.entry_output_dir.pack(side=tk.LEFT, expand=True, fill=tk.X, padx=(0, 5))
         ttk.Button(output_frame, text="Browse", command=self.select_output_directory).pack(side=tk.RIGHT)
 
-        ttk.Button(self.converter_frame, text="Convert Files", command=self.convert_files).pack(pady=(10, 20))
+        workers_frame = ttk.Frame(self.converter_frame)
+        workers_frame.pack(fill=tk.X, pady=5)
+
+        ttk.Label(workers_frame, text="Parallel workers:", style="TLabel").pack(side=tk.LEFT, padx=(0, 5))
+        self.workers_var = tk.IntVar(value=DEFAULT_CONVERSION_WORKERS)
+        ttk.Spinbox(workers_frame, from_=1, to=max(DEFAULT_CONVERSION_WORKERS, 32), textvariable=self.workers_var, width=5).pack(side=tk.LEFT)
+
+        self.converter_dedup_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(workers_frame, text="Drop duplicate phone numbers across files", variable=self.converter_dedup_var).pack(side=tk.LEFT, padx=(20, 0))
+
+        converter_normalize_frame = ttk.Frame(self.converter_frame)
+        converter_normalize_frame.pack(fill=tk.X, pady=5)
+        self.converter_normalize_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(converter_normalize_frame, text="Normalize numbers (E.164), country code:", variable=self.converter_normalize_var).pack(side=tk.LEFT, padx=(0, 5))
+        self.converter_country_code_entry = ttk.Entry(converter_normalize_frame, width=6)
+        self.converter_country_code_entry.pack(side=tk.LEFT)
+        self.converter_country_code_entry.insert(0, DEFAULT_COUNTRY_CODE)
+
+        converter_shard_frame = ttk.Frame(self.converter_frame)
+        converter_shard_frame.pack(fill=tk.X, pady=5)
+        ttk.Label(converter_shard_frame, text="Split VCF output into files of at most", style="TLabel").pack(side=tk.LEFT, padx=(0, 5))
+        self.shard_contacts_entry = ttk.Entry(converter_shard_frame, width=8)
+        self.shard_contacts_entry.pack(side=tk.LEFT)
+        ttk.Label(converter_shard_frame, text="contacts and/or", style="TLabel").pack(side=tk.LEFT, padx=5)
+        self.shard_mb_entry = ttk.Entry(converter_shard_frame, width=6)
+        self.shard_mb_entry.pack(side=tk.LEFT)
+        ttk.Label(converter_shard_frame, text="MB (leave empty for one file)", style="TLabel").pack(side=tk.LEFT, padx=5)
+
+        converter_incremental_frame = ttk.Frame(self.converter_frame)
+        converter_incremental_frame.pack(fill=tk.X, pady=5)
+        self.converter_incremental_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(converter_incremental_frame, text="Skip files unchanged since the last conversion", variable=self.converter_incremental_var).pack(side=tk.LEFT)
+        self.converter_force_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(converter_incremental_frame, text="Force rebuild", variable=self.converter_force_var).pack(side=tk.LEFT, padx=(20, 0))
+
+        converter_buttons_frame = ttk.Frame(self.converter_frame)
+        converter_buttons_frame.pack(pady=(10, 20))
+        ttk.Button(converter_buttons_frame, text="Convert Files", command=self.convert_files).pack(side=tk.LEFT, padx=5)
+        ttk.Button(converter_buttons_frame, text="Watch a Folder...", command=self.watch_folder).pack(side=tk.LEFT, padx=5)
 
         self.converter_result_label = ttk.Label(self.converter_frame, text="", wraplength=640, justify="left")
         self.converter_result_label.pack(pady=(10, 0))
@@ -163,6 +389,13 @@ class CombinedCSVApp:
 1. Load CSV Files: 
    - Click 'Load CSV Files' to select and load one or multiple CSV files.
    - The contents will be displayed in a table format for easy viewing.
+   - Parquet (.parquet) and Arrow (.arrow, .feather) files load too, many times faster than
+     CSV. Saving a large contact set in one of these formats makes reopening it quick.
+   - Type in 'Search name or phone' to show only the matching rows: part of a name, or part
+     of a phone number in any format (0712 345 678 and +254712345678 find the same contact).
+     Tick 'Starts with' to match from the beginning only; 'Clear' shows every row again.
+   - Tick 'Compact memory' before loading to store repeated values as categories and text as
+     Arrow strings, which takes much less memory for millions of rows.
 
 2. Edit Contents: 
    - View and examine the loaded CSV data in the table.
@@ -172,10 +405,12 @@ class CombinedCSVApp:
    - Enter a 'New Name Prefix' in the provided field.
    - Specify the 'Starting Index' for numbering.
    - Click 'Change Names' to apply changes to the first column entries.
+   - Numbers are padded to the same width (at least 3 digits) so names sort in order.
 
 4. Save: 
    - Click 'Save Merged CSV' to save your edited and merged CSV file.
-   - Choose a location and filename for the output file.
+   - Choose a location and filename for the output file; pick the .parquet or .arrow
+     type to save in a columnar format instead of CSV.
 
  CSV Merger Tab
 
@@ -185,7 +420,16 @@ class CombinedCSVApp:
 
 2. Merge: 
    - Click 'Merge Files' to combine the selected files into one CSV file.
-   - Files are merged in the order they appear in the list.
+   - Files are merged in order of the last number in their names; files without a number come last.
+   - Tick 'Streaming merge' for very large files: rows are copied straight to the output
+     without loading the files into memory, but all files must have the same header.
+   - Parquet and Arrow files can be merged too, and saved to, with the normal (non-streaming) merge.
+   - Files already opened in the editor, or merged before, are not read again if they have not
+     changed since. Up to 512 MB of parsed files are kept; set the CSV_VCF_CACHE_MB environment
+     variable to change that.
+   - Pick 'Sorted by name' or 'Sorted by phone' under 'Row order' to sort all rows of the merged
+     file. Sorting works in pieces on disk, so it also handles files too large for memory; the
+     files must be CSV with the same header.
 
 3. Save: 
    - You'll be prompted to choose a location and filename for the merged file.
@@ -193,7 +437,7 @@ class CombinedCSVApp:
  CSV Maker Tab
 
 1. Enter Phone Numbers:
-   - Type or paste phone numbers into the text area, one per line.
+   - Type or paste phone numbers into the text area, one per line. Blank lines are skipped.
 
 2. Set Name Prefix:
    - Enter a prefix for contact names in the 'Name Prefix' field.
@@ -207,9 +451,17 @@ class CombinedCSVApp:
    - Click 'Convert to CSV' to create a new CSV file with the entered data.
    - Choose a location and filename for the new CSV file.
 
-5. Concatenate (Optional):
+5. Make from Files (for long lists):
+   - Click 'Make from Files...' to read the numbers from one or more text files (one number
+     per line) or CSV files (the phone column) instead of pasting them.
+   - The name prefix, start index and normalization set above are used. Save as .csv for a
+     contacts CSV or as .vcf to get the vCards directly.
+   - Numbers are processed in chunks straight to disk, so lists of millions of numbers work.
+
+6. Concatenate (Optional):
    - After creating a CSV, the 'Concatenate with another CSV' button becomes active.
-   - Use this to combine the newly created CSV with an existing one.
+   - Use this to combine the newly created CSV with an existing one. The new contacts are taken
+     from memory, so the file just saved is not read back.
 
  CSV/VCF Converter Tab
 
@@ -224,18 +476,54 @@ class CombinedCSVApp:
    - Click 'Browse' to choose the output directory for converted files.
 
 4. Convert: 
+   - Set 'Parallel workers' to the number of files to convert at the same time.
    - Click 'Convert Files' to perform the conversion.
    - Converted files will be saved in the specified output directory.
+   - If some files fail, the others are still converted and the failures are listed.
+
+5. Watch a Folder:
+   - Click 'Watch a Folder...' and pick a folder to convert every CSV and VCF file that is
+     dropped into it, as it arrives, into the output directory (CSV to VCF and VCF to CSV by
+     extension). Files already in the folder are converted first.
+   - A file is converted once it has stopped changing for a couple of seconds, so large files
+     are not picked up while they are still being copied. Unchanged files are never
+     converted twice, even after a restart.
+   - Press 'Cancel' to stop watching. The output directory must not be the watched folder.
 
  General Tips
 
 - Ensure consistent headers in CSV files for accurate merging and conversion.
 - For large files, the application might take a moment to process. Please be patient.
+- Long operations run in the background: the progress bar at the bottom shows how far along
+  they are, and the 'Cancel' button stops them.
 - Always verify the output after conversion or merging.
 - When using the CSV Maker, ensure phone numbers are in a consistent format.
 - The CSV Editor supports viewing multiple files at once, but saves them as a single merged file.
 - In the Converter tab, make sure the input CSV files have 'Name' and 'Phone' columns for VCF conversion.
 - Regularly save your work, especially when dealing with large datasets.
+- Tick 'Drop duplicate phone numbers' (Editor, Merger, Converter) to keep only the first
+  occurrence of each number; the result shows how many were dropped from each file. Every
+  phone column is checked: a repeated number is cleared, and a contact is dropped only
+  when all of its numbers were repeats. Numbers are compared in E.164 form even when they
+  are not normalized, so 0712345678 and +254712345678 count as the same number (the
+  Merger and Converter use the country code next to 'Normalize numbers', the Editor 254).
+- Tick 'Normalize numbers (E.164)' (Maker, Merger, Converter) to clean up phone numbers:
+  punctuation is removed, the country code is added to local numbers (e.g. 0712345678
+  becomes +254712345678) and entries that are not valid numbers are rejected and counted.
+- After each operation the line under the progress bar shows how long it took, split into
+  read/parse/transform/render/write time, with row counts, sizes and peak memory. The same
+  figures are appended to ~/.csv-vcf-solution/metrics.jsonl (or the file named by the
+  CSV_VCF_METRICS_LOG environment variable); please attach it when reporting slowness.
+- Tick 'Profile next run' before starting an operation to record a detailed cProfile report
+  of it; the file is saved under ~/.csv-vcf-solution/profiles.
+- Every tab's operation can also run without the window, e.g. on a server:
+  python csv_vcf_cli.py convert|merge|make|rename ... (see python csv_vcf_cli.py --help).
+- Fill in 'Split VCF output' in the Converter tab when a phone struggles to import one large
+  VCF file: contacts.csv then becomes contacts_0001.vcf, contacts_0002.vcf, ... and
+  contacts_index.csv lists the contacts in each part. The same input always splits the same way.
+- Tick 'Skip files unchanged since the last conversion' in the Converter tab to convert only
+  new or edited files. A .csv-vcf-manifest.json file in the output directory remembers each
+  input's content hash and the options used; tick 'Force rebuild' to convert everything again.
 
  If you encounter any issues or have suggestions for improvement, please let us know through:
     camreshjames@gmail.com or https://cnjmtechnologies.com/
@@ -271,8 +559,19 @@ class CombinedCSVApp:
         self.start_index_entry.pack(side=tk.LEFT)
         self.start_index_entry.insert(0, "1")
 
-        btn_convert = ttk.Button(self.maker_merger_frame, text="Convert to CSV", command=self.convert_to_csv)
-        btn_convert.pack(pady=(10, 5))
+        normalize_frame = ttk.Frame(self.maker_merger_frame)
+        normalize_frame.pack(fill=tk.X, pady=5)
+
+        self.maker_normalize_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(normalize_frame, text="Normalize numbers (E.164), country code:", variable=self.maker_normalize_var).pack(side=tk.LEFT, padx=(0, 5))
+        self.maker_country_code_entry = ttk.Entry(normalize_frame, width=6)
+        self.maker_country_code_entry.pack(side=tk.LEFT)
+        self.maker_country_code_entry.insert(0, DEFAULT_COUNTRY_CODE)
+
+        maker_buttons_frame = ttk.Frame(self.maker_merger_frame)
+        maker_buttons_frame.pack(pady=(10, 5))
+        ttk.Button(maker_buttons_frame, text="Convert to CSV", command=self.convert_to_csv).pack(side=tk.LEFT, padx=5)
+        ttk.Button(maker_buttons_frame, text="Make from Files...", command=self.make_from_files).pack(side=tk.LEFT, padx=5)
 
         self.btn_concatenate = ttk.Button(self.maker_merger_frame, text="Concatenate with another CSV", command=self.concatenate_csv, state=tk.DISABLED)
         self.btn_concatenate.pack(pady=5)
@@ -281,58 +580,98 @@ class CombinedCSVApp:
         self.maker_merger_result_label.pack(pady=(10, 0))
 
     def convert_to_csv(self):
-        phone_numbers = self.phone_numbers_text.get("1.0", tk.END).strip().split('\n')
+        lines = self.phone_numbers_text.get("1.0", tk.END).split('\n')
         name_prefix = self.name_prefix_entry.get().strip()
         start_index = int(self.start_index_entry.get())
+        country_code = self.maker_country_code_entry.get() if self.maker_normalize_var.get() else None
 
-        # Prepare the data
-        data = []
-        for i, phone in enumerate(phone_numbers):
-            name = f"{name_prefix} {str(start_index + i).zfill(3)}"
-            data.append({"name": name, "phone": phone.strip()})
-
-        # Convert to DataFrame
-        df = pd.DataFrame(data)
-
-        # Save to CSV
         output_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
-        if output_path:
-            df.to_csv(output_path, index=False)
-            self.update_merger_result_maker(f"CSV file saved successfully as:\n{output_path}", "success")
-            
+        if not output_path:
+            self.update_merger_result_maker("CSV file was not saved.", "error")
+            return
+
+        def work(job):
+            df, rejected_lines = make_contacts_frame(lines, name_prefix, start_index, country_code, job.metrics)
+            write_frames([df], output_path, job.report, job.metrics)
+            return df, rejected_lines
+
+        def done(result):
+            df, rejected_lines = result
+            # Kept so concatenating does not have to read the file back
+            self.maker_result = (output_path, df)
+            message = f"CSV file saved successfully as:\n{output_path}"
+            if len(rejected_lines):
+                examples = ", ".join(f"line {line}: {phone!r}" for line, phone in rejected_lines.head(5).items())
+                message += f"\n\nRejected {len(rejected_lines):,} invalid number(s), e.g. {examples}"
+            self.update_merger_result_maker(message, "success")
             # Enable concatenate button after creating the first CSV
             self.btn_concatenate.config(state=tk.NORMAL)
-        else:
-            self.update_merger_result_maker("CSV file was not saved.", "error")
+
+        self.start_job("Creating CSV", work, self.update_merger_result_maker, done)
+
+    def make_from_files(self):
+        # For long lists: numbers are read from the files and written out in chunks,
+        # without going through the text box or a DataFrame
+        file_paths = filedialog.askopenfilenames(filetypes=[("Phone Lists", "*.txt *.csv"), ("All Files", "*.*")])
+        if not file_paths:
+            self.update_merger_result_maker("No files selected.", "error")
+            return
+
+        name_prefix = self.name_prefix_entry.get().strip()
+        start_index = int(self.start_index_entry.get())
+        country_code = self.maker_country_code_entry.get() if self.maker_normalize_var.get() else None
+
+        output_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv"), ("VCF Files", "*.vcf")])
+        if not output_path:
+            self.update_merger_result_maker("Contacts file was not saved.", "error")
+            return
+
+        def work(job):
+            normalizer = PhoneNormalizer(country_code) if country_code is not None else None
+            count = stream_make_contacts(file_paths, output_path, name_prefix, start_index, normalizer, job.report, job.metrics)
+            return count, "" if normalizer is None else "\n\n" + normalizer.summary()
+
+        def done(result):
+            count, report = result
+            self.update_merger_result_maker(f"{count:,} contacts saved successfully as:\n{output_path}{report}", "success")
+            if output_path.lower().endswith(".vcf"):
+                self.maker_result = None
+                self.btn_concatenate.config(state=tk.DISABLED)
+            else:
+                # Not kept in memory; concatenating reads it back through the file cache
+                self.maker_result = (output_path, None)
+                self.btn_concatenate.config(state=tk.NORMAL)
+
+        self.start_job("Making contacts", work, self.update_merger_result_maker, done)
 
     def concatenate_csv(self):
-        # Ask user to select the second CSV file
-        second_csv_path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
+        # Ask user to select the second file
+        second_csv_path = filedialog.askopenfilename(filetypes=TABLE_OPEN_TYPES)
         if not second_csv_path:
             self.update_merger_result_maker("No file selected for concatenation.", "error")
             return
 
-        try:
-            # Read the second CSV
-            df_second = pd.read_csv(second_csv_path)
-
-            # Read the first CSV (the one we just created)
-            first_csv_path = self.merger_result_label.cget("text").split("\n")[-1]
-            df_first = pd.read_csv(first_csv_path)
+        output_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=TABLE_SAVE_TYPES)
+        if not output_path:
+            self.update_merger_result_maker("Concatenated CSV file was not saved.", "error")
+            return
 
-            # Concatenate the DataFrames
-            df_concatenated = pd.concat([df_first, df_second], ignore_index=True)
+        # The CSV just made is still in memory unless it was made from files; the others come
+        # from the shared cache when another tab has parsed them already
+        first_csv_path, df_first = self.maker_result
 
-            # Save the concatenated DataFrame
-            output_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
-            if output_path:
-                df_concatenated.to_csv(output_path, index=False)
-                self.update_merger_result_maker(f"Concatenated CSV file saved successfully as:\n{output_path}", "success")
-            else:
-                self.update_merger_result_maker("Concatenated CSV file was not saved.", "error")
+        def work(job):
+            first = df_first if df_first is not None else read_frame_file(first_csv_path, job.metrics, cache=FRAME_CACHE)
+            df_second = read_frame_file(second_csv_path, job.metrics, cache=FRAME_CACHE)
+            write_frames([first, df_second], output_path, job.report, job.metrics)
+            return output_path
 
-        except Exception as e:
-            self.update_merger_result_maker(f"Error during concatenation: {str(e)}", "error")
+        self.start_job(
+            "Concatenating",
+            work,
+            self.update_merger_result_maker,
+            lambda result: self.update_merger_result_maker(f"Concatenated CSV file saved successfully as:\n{result}", "success"),
+        )
 
     def update_merger_result_maker(self, message, status):
         self.maker_merger_result_label.config(text=message)
@@ -340,6 +679,8 @@ class CombinedCSVApp:
             self.maker_merger_result_label.configure(style="Error.TLabel")
         elif status == "success":
             self.maker_merger_result_label.configure(style="Success.TLabel")
+        else:
+            self.maker_merger_result_label.configure(style="TLabel")
 
     # Converter methods
     def select_files_for_conversion(self):
@@ -368,18 +709,99 @@ class CombinedCSVApp:
             messagebox.showwarning("Warning", "Please select files to convert first.")
             return
 
-        try:
-            converted_files = []
-            for file_path in file_paths:
-                if self.current_mode.get() == "csv2vcf":
-                    output_path = self.convert_csv_to_vcf(file_path, output_dir)
+        options = self.read_converter_options()
+        if options is None:
+            return
+        max_workers, shard_limits, country_code = options
+
+        mode = self.current_mode.get()
+        dedup = self.converter_dedup_var.get()
+        dedup_country_code = self.converter_country_code_entry.get()
+        incremental = self.converter_incremental_var.get()
+        force = self.converter_force_var.get()
+
+        def work(job):
+            normalizer = PhoneNormalizer(country_code) if country_code is not None else None
+            skipped = []
+            with PhoneIndex(dedup_country_code) if dedup else contextlib.nullcontext() as dedup_index:
+                if incremental:
+                    results, skipped = convert_files_incremental(file_paths, output_dir, mode, max_workers, job.report, dedup_index, normalizer, job.metrics, force, shard_limits)
                 else:
-                    output_path = self.convert_vcf_to_csv(file_path, output_dir)
-                converted_files.append(output_path)
-            
-            self.converter_result_label.config(text=f"Conversion successful!\nFiles saved in:\n{output_dir}\n\nConverted files:\n" + "\n".join(str(f) for f in converted_files))
-        except Exception as e:
-            messagebox.showerror("Error", f"Error during conversion: {str(e)}")
+                    results = convert_files_parallel(file_paths, output_dir, mode, max_workers, job.report, dedup_index, normalizer, job.metrics, shard_limits)
+                reports = [stage.summary() for stage in (dedup_index, normalizer) if stage is not None]
+            return results, skipped, "".join("\n\n" + report for report in reports)
+
+        def done(result):
+            results, skipped, dedup_summary = result
+            skipped = set(skipped)
+            converted_files = [output_path for file_path, output_path, error in results if error is None and file_path not in skipped]
+            failed_files = [f"{file_path}: {error}" for file_path, _, error in results if error is not None]
+
+            summary = f"Files saved in:\n{output_dir}\n\nConverted files:\n" + "\n".join(str(f) for f in converted_files) + dedup_summary
+            if skipped:
+                summary += f"\n\nSkipped {len(skipped)} unchanged file(s)."
+            if failed_files:
+                summary = f"Converted {len(converted_files)} of {len(results)} files.\n{summary}\n\nFailed files:\n" + "\n".join(failed_files)
+                self.update_converter_result(summary, "error")
+                messagebox.showwarning("Warning", f"{len(failed_files)} file(s) could not be converted.")
+            else:
+                self.update_converter_result(f"Conversion successful!\n{summary}", "success")
+
+        self.start_job("Conversion", work, self.update_converter_result, done)
+
+    def read_converter_options(self):
+        # (max_workers, shard_limits, country_code) from the converter tab, or None after showing an error
+        try:
+            max_workers = int(self.workers_var.get())
+        except (tk.TclError, ValueError):
+            messagebox.showerror("Error", "Parallel workers must be a number.")
+            return None
+
+        shard_contacts = self.shard_contacts_entry.get().strip()
+        shard_mb = self.shard_mb_entry.get().strip()
+        shard_limits = None
+        if shard_contacts or shard_mb:
+            try:
+                shard_limits = ShardLimits(int(shard_contacts) if shard_contacts else None, float(shard_mb) if shard_mb else None)
+            except ValueError:
+                messagebox.showerror("Error", "The split limits must be a whole number of contacts and/or a size in MB.")
+                return None
+
+        country_code = self.converter_country_code_entry.get() if self.converter_normalize_var.get() else None
+        return max_workers, shard_limits, country_code
+
+    def watch_folder(self):
+        output_dir = self.entry_output_dir.get()
+        if not output_dir:
+            messagebox.showwarning("Warning", "Please select an output directory first.")
+            return
+        options = self.read_converter_options()
+        if options is None:
+            return
+        max_workers, shard_limits, country_code = options
+
+        input_dir = filedialog.askdirectory(title="Folder to watch for new CSV and VCF files")
+        if not input_dir:
+            return
+        normalizer = PhoneNormalizer(country_code) if country_code is not None else None
+        try:
+            watcher = FolderWatcher(input_dir, output_dir, max_workers, normalizer, shard_limits)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+
+        # Runs until 'Cancel' is pressed; the progress line shows the running counts
+        self.start_job(f"Watching {os.path.basename(input_dir)}", lambda job: watcher.run(job.report, None, job.metrics),
+                       self.update_converter_result, lambda result: None)
+
+    def update_converter_result(self, message, status):
+        self.converter_result_label.config(text=message)
+        if status == "error":
+            self.converter_result_label.configure(foreground="#D32F2F")
+        elif status == "success":
+            self.converter_result_label.configure(foreground="#388E3C")
+        else:
+            self.converter_result_label.configure(foreground="")
 
     def update_converter_ui(self):
         if self.current_mode.get() == "csv2vcf":
@@ -389,84 +811,57 @@ class CombinedCSVApp:
             self.converter_label.config(text="Select VCF files to convert to CSV:")
             self.btn_select_files.config(text="Select VCF Files")
 
-    def create_vcard(self, name, phone_numbers):
-        vcard = (
-            "BEGIN:VCARD\n"
-            "VERSION:2.1\n"
-            f"N:;{name};;;\n"
-            f"FN:{name}\n"
-        )
-        for phone in phone_numbers:
-            vcard += f"TEL;CELL:{phone}\n"
-        vcard += "END:VCARD\n"
-        return vcard
-
-    def convert_csv_to_vcf(self, csv_path, output_dir):
-        contacts = []
-        with open(csv_path, mode='r') as file:
-            csv_reader = csv.reader(file)
-            next(csv_reader)  # Skip header row
-            
-            for row in csv_reader:
-                if len(row) >= 2:
-                    name = row[0].strip()
-                    phone_numbers = [num.strip() for num in row[1:] if num.strip()]
-                    contacts.append((name, phone_numbers))
-        
-        vcards = [self.create_vcard(name, phone_numbers) for name, phone_numbers in contacts]
-        
-        output_path = Path(output_dir) / Path(csv_path).with_suffix('.vcf').name
-        with open(output_path, mode='w') as file:
-            file.writelines(vcards)
-        
-        return output_path
-
-    def convert_vcf_to_csv(self, vcf_path, output_dir):
-            contacts = []
-            with open(vcf_path, mode='r') as file:
-                lines = file.readlines()
-                contact = {}
-                for line in lines:
-                    if line.startswith("FN:"):
-                        contact["name"] = line.split(":", 1)[1].strip()
-                    elif line.startswith("TEL;"):
-                        if "phone" not in contact:
-                            contact["phone"] = []
-                        contact["phone"].append(line.split(":", 1)[1].strip())
-                    elif line.startswith("END:VCARD"):
-                        if "name" in contact and "phone" in contact:
-                            contacts.append((contact["name"], contact["phone"]))
-                        contact = {}
-
-            output_path = Path(output_dir) / Path(vcf_path).with_suffix('.csv').name
-            with open(output_path, mode='w', newline='') as file:
-                csv_writer = csv.writer(file)
-                csv_writer.writerow(["Name", "Phone Number 1", "Phone Number 2"])
-                for contact in contacts:
-                    row = [contact[0]] + contact[1][:2] + [''] * (2 - len(contact[1]))
-                    csv_writer.writerow(row)
-
-            return output_path
-
     # CSV Editor methods
     def load_csv_files(self):
-        file_paths = filedialog.askopenfilenames(filetypes=[("CSV Files", "*.csv")])
-        if file_paths:
-            self.dfs = []
-            for file_path in file_paths:
-                try:
-                    df = pd.read_csv(file_path)
-                    self.dfs.append(df)
-                except Exception as e:
-                    messagebox.showerror("Error", f"Failed to load {file_path}: {str(e)}")
-            
-            if self.dfs:
+        file_paths = filedialog.askopenfilenames(filetypes=TABLE_OPEN_TYPES)
+        if not file_paths:
+            return
+        compact = self.editor_compact_var.get()
+
+        def work(job):
+            dfs, sources, errors = read_csv_files(file_paths, job.report, job.metrics, compact, FRAME_CACHE)
+            search_index = ContactSearchIndex(dfs, metrics=job.metrics) if dfs else None
+            return dfs, sources, errors, search_index
+
+        def done(result):
+            dfs, sources, errors, search_index = result
+            if dfs:
+                self.dfs = dfs
+                self.df_sources = sources
+                self.search_index = search_index
+                self.tree_offset = 0
                 self.update_treeview()
+                self.apply_search()
+            rows = sum(len(df) for df in dfs)
+            self.update_editor_result(f"Loaded {rows:,} rows from {len(dfs)} file(s).", "success" if dfs else "error")
+            if errors:
+                messagebox.showerror("Error", "\n".join(errors))
+
+        self.start_job("Loading CSV files", work, self.update_editor_result, done)
+
+    def update_editor_result(self, message, status):
+        self.editor_result_label.config(text=message)
+        if status == "error":
+            self.editor_result_label.configure(foreground="#D32F2F")
+        elif status == "success":
+            self.editor_result_label.configure(foreground="#388E3C")
+        else:
+            self.editor_result_label.configure(foreground="")
 
     def update_treeview(self):
+        # Rebuild the columns and the row index over self.dfs. Rows themselves are only
+        # materialized for the visible window by render_treeview.
         self.tree.delete(*self.tree.get_children())
-        
+        self.tree_row_starts = []
+        self.tree_total_rows = 0
+        for df in self.dfs:
+            self.tree_row_starts.append(self.tree_total_rows)
+            self.tree_total_rows += len(df)
+        self.tree_cache = (0, [])
+        self.tree_filter = None
+
         if not self.dfs:
+            self.tree_scrollbar.set(0, 1)
             return
 
         columns = list(self.dfs[0].columns)
@@ -475,73 +870,208 @@ class CombinedCSVApp:
             self.tree.heading(col, text=col)
             self.tree.column(col, width=100)
 
-        for df in self.dfs:
-            for index, row in df.iterrows():
-                self.tree.insert("", "end", values=list(row))
+        self.render_treeview()
+
+    def refresh_treeview_rows(self):
+        # Columns and row counts are unchanged, so only the visible cells need new values
+        self.tree_cache = (0, [])
+        self.render_treeview()
+
+    def visible_tree_rows(self):
+        rowheight = int(self.style.lookup("Treeview", "rowheight") or 25)
+        # One row's worth of height is taken by the headings
+        return max(1, self.tree.winfo_height() // rowheight - 1)
+
+    def fetch_tree_rows(self, start, stop):
+        if self.tree_filter is not None:
+            # Only the visible window plus its buffer, so a row at a time is quick enough
+            rows = []
+            for row in self.tree_filter[start:stop]:
+                i = bisect.bisect_right(self.tree_row_starts, row) - 1
+                rows.extend(self.dfs[i].iloc[[row - self.tree_row_starts[i]]].values.tolist())
+            return rows
+
+        rows = []
+        i = bisect.bisect_right(self.tree_row_starts, start) - 1
+        while start < stop and i < len(self.dfs):
+            local_start = start - self.tree_row_starts[i]
+            chunk = self.dfs[i].iloc[local_start:local_start + stop - start].values.tolist()
+            rows.extend(chunk)
+            start += len(chunk)
+            i += 1
+        return rows
+
+    def render_treeview(self):
+        visible = self.visible_tree_rows()
+        total = self.tree_total_rows
+        self.tree_offset = max(0, min(self.tree_offset, total - visible))
+        start, stop = self.tree_offset, min(self.tree_offset + visible, total)
+
+        cache_start, cache_rows = self.tree_cache
+        if start < cache_start or stop > cache_start + len(cache_rows):
+            cache_start = max(0, start - TREE_BUFFER_ROWS)
+            cache_rows = self.fetch_tree_rows(cache_start, min(total, stop + TREE_BUFFER_ROWS))
+            self.tree_cache = (cache_start, cache_rows)
+        rows = cache_rows[start - cache_start:stop - cache_start]
+
+        # Reuse the existing items so scrolling only changes their values
+        items = self.tree.get_children()
+        for i, values in enumerate(rows):
+            if i < len(items):
+                self.tree.item(items[i], values=values)
+            else:
+                self.tree.insert("", "end", values=values)
+        if len(items) > len(rows):
+            self.tree.delete(*items[len(rows):])
+
+        if total:
+            self.tree_scrollbar.set(start / total, stop / total)
+        else:
+            self.tree_scrollbar.set(0, 1)
+
+    def scroll_treeview(self, action, amount, unit=None):
+        if action == "moveto":
+            self.tree_offset = int(float(amount) * self.tree_total_rows)
+        elif unit == "pages":
+            self.tree_offset += int(amount) * self.visible_tree_rows()
+        else:
+            self.tree_offset += int(amount)
+        self.render_treeview()
+
+    def on_treeview_wheel(self, event):
+        self.scroll_treeview("scroll", -3 if event.delta > 0 else 3, "units")
+        return "break"
+
+    def set_tree_filter(self, rows):
+        # rows: sorted global row indexes to show, or None for every row
+        self.tree_filter = rows
+        self.tree_total_rows = len(rows) if rows is not None else sum(len(df) for df in self.dfs)
+        self.tree_offset = 0
+        self.tree_cache = (0, [])
+        self.render_treeview()
+
+    def schedule_search(self):
+        # Searches once typing pauses rather than on every keystroke
+        if self.search_after is not None:
+            self.master.after_cancel(self.search_after)
+        self.search_after = self.master.after(SEARCH_DELAY_MS, self.apply_search)
+
+    def apply_search(self):
+        self.search_after = None
+        query = self.search_var.get().strip()
+        if self.search_index is None or not query:
+            if self.tree_filter is not None:
+                self.set_tree_filter(None)
+            self.search_result_label.config(text="")
+            return
+
+        started = time.perf_counter()
+        rows = self.search_index.search(query, self.search_prefix_var.get())
+        elapsed = time.perf_counter() - started
+        self.set_tree_filter(rows)
+        self.search_result_label.config(text=f"{len(rows):,} matching rows ({elapsed * 1000:.0f} ms)")
 
     def change_names(self):
         if not self.dfs:
             messagebox.showwarning("Warning", "Please load CSV files first.")
             return
 
-        prefix = self.name_prefix_entry.get()
+        prefix = self.editor_name_prefix_entry.get()
         try:
-            start_index = int(self.start_index_entry.get())
+            start_index = int(self.editor_start_index_entry.get())
         except ValueError:
             messagebox.showerror("Error", "Starting Index must be a number.")
             return
 
-        name_column = self.dfs[0].columns[0]
-        total_rows = sum(len(df) for df in self.dfs)
-
-        new_names = [f"{prefix} {str(i).zfill(3)}" for i in range(start_index, start_index + total_rows)]
-
-        current_index = 0
-        for df in self.dfs:
-            df_length = len(df)
-            df[name_column] = new_names[current_index:current_index + df_length]
-            current_index += df_length
-
-        self.update_treeview()
+        # Quick enough to run on the main thread, but still measured like the background jobs
+        metrics = OperationMetrics("Changing names")
+        metrics.start()
+        rename_frames(self.dfs, prefix, start_index, metrics)
+        if self.editor_compact_var.get():
+            with metrics.stage("transform"):
+                for df in self.dfs:
+                    compact_frame(df, df.columns[:1])
+        if self.search_index is not None:
+            self.search_index.update_names(self.dfs, metrics)
+        metrics.finish()
+        self.show_operation_metrics(metrics, "ok")
+        if self.search_var.get().strip():
+            self.apply_search()  # The names changed, so the matches may have too
+        else:
+            self.refresh_treeview_rows()
 
     def save_csv(self):
         if not self.dfs:
             messagebox.showwarning("Warning", "No data to save. Please load and edit CSV files first.")
             return
 
-        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
+        file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=TABLE_SAVE_TYPES)
         if file_path:
-            merged_df = pd.concat(self.dfs, ignore_index=True)
-            merged_df.to_csv(file_path, index=False)
-            messagebox.showinfo("Success", f"Merged file saved successfully to {file_path}")
+            dfs = list(self.dfs)
+            sources = list(self.df_sources)
+            dedup = self.editor_dedup_var.get()
+
+            def work(job):
+                if not dedup:
+                    write_frames(dfs, file_path, job.report, job.metrics)
+                    return ""
+                with PhoneIndex() as dedup_index:
+                    unique_dfs = filter_frames(dfs, sources, dedup_index, None, job.metrics)
+                    write_frames(unique_dfs, file_path, job.report, job.metrics)
+                    return "\n" + dedup_index.summary()
+
+            self.start_job(
+                "Saving merged CSV",
+                work,
+                self.update_editor_result,
+                lambda dedup_summary: self.update_editor_result(f"Merged file saved successfully to {file_path}{dedup_summary}", "success"),
+            )
 
     # CSV Merger methods
     def select_files_for_merge(self):
-        file_paths = filedialog.askopenfilenames(filetypes=[("CSV Files", "*.csv")])
+        file_paths = filedialog.askopenfilenames(filetypes=TABLE_OPEN_TYPES)
         if file_paths:
             self.files_text.delete('1.0', tk.END)
             for file in file_paths:
                 self.files_text.insert(tk.END, file + '\n')
 
     def merge_files(self):
-        file_paths = self.files_text.get('1.0', tk.END).strip().split('\n')
+        file_paths = [line.strip() for line in self.files_text.get('1.0', tk.END).split('\n') if line.strip()]
         if not file_paths:
             self.update_merger_result("No files selected for merging.", "error")
             return
 
-        try:
-            sorted_files = sorted(file_paths, key=lambda x: int(re.findall(r'\d+', os.path.basename(x))[-1]))
-            df_list = [pd.read_csv(file) for file in sorted_files]
-            df_merged = pd.concat(df_list, ignore_index=True)
-
-            output_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV Files", "*.csv")])
-            if output_path:
-                df_merged.to_csv(output_path, index=False)
-                self.update_merger_result(f"Merged CSV file saved successfully as:\n{output_path}", "success")
-            else:
-                self.update_merger_result("Merged CSV file was not saved.", "error")
-        except Exception as e:
-            self.update_merger_result(f"Error during merging: {str(e)}", "error")
+        sorted_files = sorted(file_paths, key=merge_sort_key)
+        streaming = self.streaming_merge_var.get()
+        sort_by = self.merger_sort_var.get()
+        dedup = self.merger_dedup_var.get()
+        dedup_country_code = self.merger_country_code_entry.get()
+        country_code = self.merger_country_code_entry.get() if self.merger_normalize_var.get() else None
+
+        output_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=TABLE_SAVE_TYPES)
+        if not output_path:
+            self.update_merger_result("Merged CSV file was not saved.", "error")
+            return
+
+        def work(job):
+            normalizer = PhoneNormalizer(country_code) if country_code is not None else None
+            with PhoneIndex(dedup_country_code) if dedup else contextlib.nullcontext() as dedup_index:
+                if sort_by:
+                    output = sorted_merge_csv_files(sorted_files, output_path, job.report, dedup_index, normalizer, job.metrics, sort_by)
+                elif streaming:
+                    output = stream_merge_csv_files(sorted_files, output_path, job.report, dedup_index, normalizer, job.metrics)
+                else:
+                    # Files already parsed by the editor or an earlier merge come from the cache
+                    output = merge_csv_files_in_memory(sorted_files, output_path, job.report, dedup_index, normalizer, job.metrics, FRAME_CACHE)
+                reports = [stage.summary() for stage in (dedup_index, normalizer) if stage is not None]
+            return output, "".join("\n" + report for report in reports)
+
+        self.start_job(
+            "Merging",
+            work,
+            self.update_merger_result,
+            lambda result: self.update_merger_result(f"Merged CSV file saved successfully as:\n{result[0]}{result[1]}", "success"),
+        )
 
     def update_merger_result(self, message, status):
         self.merger_result_label.config(text=message)
@@ -549,8 +1079,97 @@ class CombinedCSVApp:
             self.merger_result_label.configure(foreground="#D32F2F")
         elif status == "success":
             self.merger_result_label.configure(foreground="#388E3C")
+        else:
+            self.merger_result_label.configure(foreground="")
+
+    # Background job methods
+    def start_job(self, name, work, update_result, on_success):
+        # update_result(message, status) is the result label updater of the calling tab
+        if self.job is not None:
+            messagebox.showwarning("Warning", f"Please wait for '{self.job.name}' to finish or cancel it first.")
+            return
+
+        profile_path = None
+        if self.profile_next_job_var.get():
+            profile_path = profile_output_path(name)
+            self.profile_next_job_var.set(False)
+        self.job = BackgroundJob(name, work, profile_path)
+        self.job_update_result = update_result
+        self.job_on_success = on_success
+        self.btn_cancel_job.config(state=tk.NORMAL)
+        update_result(f"{name}...", "progress")
+        self.job.start()
+        self.master.after(JOB_POLL_INTERVAL_MS, self.poll_job)
+
+    def poll_job(self):
+        job = self.job
+        if not job.finished:
+            fraction = job.fraction()
+            if fraction is None:
+                self.progress_bar.config(mode="indeterminate")
+                self.progress_bar.step(0.02)
+            else:
+                self.progress_bar.config(mode="determinate", value=fraction)
+            self.job_update_result(f"{job.name}: {job.progress_text()}", "progress")
+            self.master.after(JOB_POLL_INTERVAL_MS, self.poll_job)
+            return
+
+        self.job = None
+        self.btn_cancel_job.config(state=tk.DISABLED)
+        self.progress_bar.config(mode="determinate", value=0)
+        if isinstance(job.error, JobCancelled):
+            self.show_operation_metrics(job.metrics, "cancelled", job.profile_path)
+            self.job_update_result(f"{job.name} cancelled.", "error")
+        elif job.error is not None:
+            self.show_operation_metrics(job.metrics, "error", job.profile_path)
+            self.job_update_result(f"Error during {job.name.lower()}: {str(job.error)}", "error")
+        else:
+            self.show_operation_metrics(job.metrics, "ok", job.profile_path)
+            self.job_on_success(job.result)
+
+    def show_operation_metrics(self, metrics, status, profile_path=None):
+        metrics.log(self.metrics_log_path, status, profile=profile_path)
+        text = metrics.summary()
+        if status != "ok":
+            text += f" ({status})"
+        if profile_path:
+            text += f"\nProfile saved to {profile_path}"
+        self.metrics_label.config(text=text)
+
+    def cancel_job(self):
+        if self.job is not None:
+            self.job.cancel()
+            self.btn_cancel_job.config(state=tk.DISABLED)
+
+def report_startup(imports_done, ui_built):
+    # Runs on the first idle pass of the main loop, after the window has been drawn
+    first_paint = time.perf_counter()
+    threading.Thread(target=preload_heavy_modules, daemon=True).start()
+
+    log_path = os.environ.get(STARTUP_LOG_ENV)
+    if not log_path:
+        return
+    report = {
+        "started": datetime.datetime.now().isoformat(timespec="seconds"),
+        "executable": sys.executable,
+        "frozen": getattr(sys, "frozen", False),
+        "import_seconds": round(imports_done - STARTUP_STARTED, 4),
+        "ui_build_seconds": round(ui_built - imports_done, 4),
+        "first_paint_seconds": round(first_paint - ui_built, 4),
+        "total_seconds": round(first_paint - STARTUP_STARTED, 4),
+    }
+    try:
+        with open(log_path, mode='a') as file:
+            file.write(json.dumps(report) + "\n")
+    except OSError:
+        pass  # Timing is diagnostics only and must never stop the app from starting
+
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # Needed for worker processes in the PyInstaller build
+    imports_done = time.perf_counter()
     root = tk.Tk()
     app = CombinedCSVApp(root)
+    ui_built = time.perf_counter()
+    root.after_idle(report_startup, imports_done, ui_built)
     root.mainloop()
\ No newline at end of file
@@ -6,7 +6,7 @@ a = Analysis(
     pathex=[],
     binaries=[],
     datas=[],
-    hiddenimports=[],
+    hiddenimports=['pandas', 'numpy', 'pyarrow', 'pyarrow.parquet', 'watchfiles'],  # Imported lazily, so the analysis cannot see them; pyarrow and watchfiles are optional
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
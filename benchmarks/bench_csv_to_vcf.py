@@ -0,0 +1,99 @@
+"""Compare the streaming CSV -> VCF engine with the original list-based one.
+
+Usage:
+    python benchmarks/bench_csv_to_vcf.py --rows 1000000
+
+Each implementation runs in its own child process so the reported peak RSS
+belongs to that implementation alone.
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import load_engine, peak_rss_mb
+import datasets
+
+
+# The implementation this benchmark was written against: collect every row,
+# build every card with +=, then writelines the whole list.
+def legacy_csv_to_vcf(csv_path, output_path):
+    contacts = []
+    with open(csv_path, mode='r') as file:
+        csv_reader = csv.reader(file)
+        next(csv_reader)
+        for row in csv_reader:
+            if len(row) >= 2:
+                name = row[0].strip()
+                phone_numbers = [num.strip() for num in row[1:] if num.strip()]
+                contacts.append((name, phone_numbers))
+
+    vcards = []
+    for name, phone_numbers in contacts:
+        vcard = (
+            "BEGIN:VCARD\n"
+            "VERSION:2.1\n"
+            f"N:;{name};;;\n"
+            f"FN:{name}\n"
+        )
+        for phone in phone_numbers:
+            vcard += f"TEL;CELL:{phone}\n"
+        vcard += "END:VCARD\n"
+        vcards.append(vcard)
+
+    with open(output_path, mode='w') as file:
+        file.writelines(vcards)
+    return len(contacts)
+
+
+def run_child(impl, csv_path):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = load_engine() if impl == "streaming" else None
+        output_path = Path(tmp) / "out.vcf"
+        start = time.perf_counter()
+        if impl == "legacy":
+            rows = legacy_csv_to_vcf(csv_path, output_path)
+        else:
+            rows = engine.stream_csv_to_vcf(csv_path, output_path)
+        elapsed = time.perf_counter() - start
+        print(json.dumps({
+            "impl": impl,
+            "rows": rows,
+            "seconds": round(elapsed, 3),
+            "rows_per_sec": round(rows / elapsed) if elapsed else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--child", choices=["legacy", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.input)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "contacts.csv")
+        datasets.write_csv(csv_path, args.rows)
+        print(f"{args.rows} rows, {os.path.getsize(csv_path) / 2**20:.1f} MB input")
+        for impl in ("legacy", "streaming"):
+            result = subprocess.run(
+                [sys.executable, __file__, "--child", impl, "--input", csv_path],
+                check=True, capture_output=True, text=True,
+            )
+            stats = json.loads(result.stdout)
+            print(f"{impl:>10}: {stats['rows_per_sec']} rows/s, "
+                  f"{stats['seconds']} s, peak RSS {stats['peak_rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    main()
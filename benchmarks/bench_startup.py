@@ -0,0 +1,71 @@
+"""Measure the GUI's cold start: imports, UI build and first paint.
+
+Usage:
+    python benchmarks/bench_startup.py --runs 5
+    python benchmarks/bench_startup.py --runs 5 --command dist/CSV-VCF-Solution.exe
+
+Needs a display. Each run starts the app with CSV_VCF_STARTUP_LOG pointing at a
+temporary file, waits for the timing line the app appends after its first paint
+and then closes it. "launch_seconds" is measured from outside the process, so for
+a PyInstaller one-file build it also covers unpacking the bundle.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT
+
+FIELDS = ["import_seconds", "ui_build_seconds", "first_paint_seconds", "total_seconds", "launch_seconds"]
+
+
+def run_once(command, log_path, timeout):
+    env = dict(os.environ, CSV_VCF_STARTUP_LOG=log_path)
+    start = time.perf_counter()
+    # The app loads its icon from the working directory
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    try:
+        while time.perf_counter() - start < timeout:
+            if os.path.exists(log_path) and os.path.getsize(log_path):
+                launch = time.perf_counter() - start
+                with open(log_path) as file:
+                    report = json.loads(file.readline())
+                report["launch_seconds"] = round(launch, 4)
+                return report
+            if process.poll() is not None:
+                raise RuntimeError(f"the app exited with status {process.returncode} before its first paint")
+            time.sleep(0.01)
+        raise RuntimeError(f"no startup report within {timeout} s")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--command", nargs="+", default=[sys.executable, str(ROOT / "CSV-VCF-Solution.py")])
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--output", help="also save every run and the medians as JSON")
+    args = parser.parse_args()
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(args.runs):
+            report = run_once(args.command, os.path.join(tmp, f"startup-{i}.jsonl"), args.timeout)
+            runs.append(report)
+            print(" ".join(f"{field}={report[field]}" for field in FIELDS))
+
+    medians = {field: round(statistics.median(run[field] for run in runs), 4) for field in FIELDS}
+    print("median " + " ".join(f"{field}={value}" for field, value in medians.items()))
+    if args.output:
+        with open(args.output, mode='w') as file:
+            json.dump({"command": args.command, "runs": runs, "median": medians}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
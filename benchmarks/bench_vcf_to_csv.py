@@ -0,0 +1,97 @@
+"""Compare the streaming vCard parser with the original readlines() loop.
+
+Usage:
+    python benchmarks/bench_vcf_to_csv.py --contacts 500000
+
+Each implementation runs in its own child process so the reported peak RSS
+belongs to that implementation alone.
+"""
+import argparse
+import csv
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import load_engine, peak_rss_mb
+import datasets
+
+
+# The implementation this benchmark was written against: readlines() the whole
+# file and scan every line with chained startswith checks.
+def legacy_vcf_to_csv(vcf_path, output_path):
+    contacts = []
+    with open(vcf_path, mode='r') as file:
+        lines = file.readlines()
+        contact = {}
+        for line in lines:
+            if line.startswith("FN:"):
+                contact["name"] = line.split(":", 1)[1].strip()
+            elif line.startswith("TEL;"):
+                if "phone" not in contact:
+                    contact["phone"] = []
+                contact["phone"].append(line.split(":", 1)[1].strip())
+            elif line.startswith("END:VCARD"):
+                if "name" in contact and "phone" in contact:
+                    contacts.append((contact["name"], contact["phone"]))
+                contact = {}
+
+    with open(output_path, mode='w', newline='') as file:
+        csv_writer = csv.writer(file)
+        csv_writer.writerow(["Name", "Phone Number 1", "Phone Number 2"])
+        for contact in contacts:
+            row = [contact[0]] + contact[1][:2] + [''] * (2 - len(contact[1]))
+            csv_writer.writerow(row)
+    return len(contacts)
+
+
+def run_child(impl, vcf_path):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = load_engine() if impl == "streaming" else None
+        output_path = Path(tmp) / "out.csv"
+        start = time.perf_counter()
+        if impl == "legacy":
+            contacts = legacy_vcf_to_csv(vcf_path, output_path)
+        else:
+            contacts = engine.stream_vcf_to_csv(vcf_path, output_path)
+        elapsed = time.perf_counter() - start
+        megabytes = os.path.getsize(vcf_path) / 2**20
+        print(json.dumps({
+            "impl": impl,
+            "contacts": contacts,
+            "seconds": round(elapsed, 3),
+            "mb_per_sec": round(megabytes / elapsed, 1) if elapsed else None,
+            "peak_rss_mb": peak_rss_mb(),
+        }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--contacts", type=int, default=500_000)
+    parser.add_argument("--child", choices=["legacy", "streaming"], help=argparse.SUPPRESS)
+    parser.add_argument("--input", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child, args.input)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        vcf_path = os.path.join(tmp, "contacts.vcf")
+        datasets.write_vcf(vcf_path, args.contacts)
+        print(f"{args.contacts} contacts, {os.path.getsize(vcf_path) / 2**20:.1f} MB input")
+        for impl in ("legacy", "streaming"):
+            result = subprocess.run(
+                [sys.executable, __file__, "--child", impl, "--input", vcf_path],
+                check=True, capture_output=True, text=True,
+            )
+            stats = json.loads(result.stdout)
+            print(f"{impl:>10}: {stats['mb_per_sec']} MB/s, "
+                  f"{stats['seconds']} s, peak RSS {stats['peak_rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    main()
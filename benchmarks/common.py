@@ -0,0 +1,40 @@
+"""Helpers shared by the benchmark scripts."""
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+
+def load_engine(uses_pandas=False):
+    import csv_vcf_engine
+    # pandas is imported lazily; for cases that use it, keep that import out of the
+    # measurements. The streaming paths never import it, so neither should their runs.
+    if uses_pandas:
+        csv_vcf_engine.preload_heavy_modules()
+    return csv_vcf_engine
+
+
+def load_app_module():
+    # The GUI script's file name is not importable, so it is loaded from its path
+    spec = importlib.util.spec_from_file_location("csv_vcf_solution", ROOT / "CSV-VCF-Solution.py")
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def peak_rss_bytes():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def peak_rss_mb():
+    peak = peak_rss_bytes()
+    return round(peak / 2**20, 1) if peak else None
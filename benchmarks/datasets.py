@@ -0,0 +1,105 @@
+"""Synthetic contact data for the benchmarks.
+
+Every generator is seeded, so the same arguments always produce the same bytes
+and results from different runs can be compared directly.
+
+Usage:
+    python benchmarks/datasets.py --rows 1000000 --out-dir /tmp/contacts
+"""
+import argparse
+import csv
+import os
+import random
+
+MAX_PHONES = 3
+SCALES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000, "10M": 10_000_000}
+
+# Long enough that a 75-octet folding writer has to split it
+LONG_NOTE = "Met at the regional sales conference, follow up about the wholesale price list " * 2
+
+
+def parse_scale(text):
+    return SCALES.get(text) or int(text.replace("_", ""))
+
+
+def random_phone(rng):
+    return f"+2547{rng.randrange(10**8):08d}"
+
+
+def iter_contacts(rows, seed=0):
+    # Most rows have one number, every third a second and every tenth a third
+    rng = random.Random(seed)
+    for i in range(rows):
+        phones = [random_phone(rng)]
+        if i % 3 == 0:
+            phones.append(f"07{rng.randrange(10**8):08d}")
+        if i % 10 == 0:
+            phones.append(random_phone(rng))
+        yield f"Contact {i:08d}", phones
+
+
+def write_csv(path, rows, seed=0):
+    with open(path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Name"] + [f"Phone Number {n}" for n in range(1, MAX_PHONES + 1)])
+        for name, phones in iter_contacts(rows, seed):
+            writer.writerow([name] + phones + [""] * (MAX_PHONES - len(phones)))
+    return path
+
+
+def fold_line(line, width=75):
+    # RFC 6350 folding: continuation lines start with a single space
+    parts = [line[:width]]
+    for i in range(width, len(line), width - 1):
+        parts.append(" " + line[i:i + width - 1])
+    return "\n".join(parts)
+
+
+def write_vcf(path, contacts, seed=0, fold_every=5):
+    with open(path, mode='w') as file:
+        for i, (name, phones) in enumerate(iter_contacts(contacts, seed)):
+            lines = ["BEGIN:VCARD", "VERSION:3.0", f"N:;{name};;;", f"FN:{name}"]
+            lines.extend(f"TEL;TYPE=CELL:{phone}" for phone in phones)
+            if fold_every and i % fold_every == 0:
+                lines.append(fold_line(f"NOTE:{LONG_NOTE}"))
+            lines.append("END:VCARD")
+            file.write("\n".join(lines) + "\n")
+    return path
+
+
+def write_split_csv(out_dir, rows, parts, seed=0):
+    # Numbered part files, the way the merger expects them named
+    paths = []
+    rows_per_part, remainder = divmod(rows, parts)
+    contacts = iter_contacts(rows, seed)
+    for part in range(parts):
+        path = os.path.join(out_dir, f"contacts_{part + 1}.csv")
+        with open(path, mode='w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(["Name"] + [f"Phone Number {n}" for n in range(1, MAX_PHONES + 1)])
+            for _ in range(rows_per_part + (1 if part < remainder else 0)):
+                name, phones = next(contacts)
+                writer.writerow([name] + phones + [""] * (MAX_PHONES - len(phones)))
+        paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=parse_scale, default=100_000, help="row count or 10k/100k/1M/10M")
+    parser.add_argument("--out-dir", default=".")
+    parser.add_argument("--parts", type=int, default=8, help="number of CSV part files for merging")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    write_csv(os.path.join(args.out_dir, "contacts.csv"), args.rows, args.seed)
+    write_vcf(os.path.join(args.out_dir, "contacts.vcf"), args.rows, args.seed)
+    parts_dir = os.path.join(args.out_dir, "parts")
+    os.makedirs(parts_dir, exist_ok=True)
+    write_split_csv(parts_dir, args.rows, args.parts, args.seed)
+    print(f"Wrote {args.rows:,} contacts to {args.out_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,296 @@
+"""Run every benchmark case at several scales and save the results as JSON.
+
+Usage:
+    python benchmarks/run_suite.py --scales 10k,100k,1M --output results.json
+    python benchmarks/run_suite.py --compare baseline.json results.json
+
+Datasets are generated once per scale into --data-dir (reused on later runs
+with the same seed) and every case runs in its own child process, so the
+reported peak RSS belongs to that case alone. Generating runs in a child
+process too: Linux carries a process's peak RSS over into the children it
+starts, so a parent that had built the Parquet file with pandas would pass
+its peak on to every case. No display is needed: the
+Treeview case drives the editor's rendering code against stub widgets.
+"""
+import argparse
+import datetime
+import importlib.util
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import ROOT, load_app_module, load_engine, peak_rss_mb
+import datasets
+
+CASES = [
+    "csv_to_vcf",
+    "vcf_to_csv_text",
+    "vcf_to_csv_mmap",
+    "merge_in_memory",
+    "merge_streaming",
+    "merge_streaming_dedup",
+    "merge_sorted",
+    "update_treeview",
+    "load_csv",
+    "load_csv_compact",
+    "load_parquet",
+]
+# Cases that go through pandas, which is preloaded for them (see load_engine)
+PANDAS_CASES = {"merge_in_memory", "merge_streaming_dedup", "update_treeview", "load_csv", "load_csv_compact", "load_parquet"}
+MERGE_PARTS = 8
+SCROLL_STEPS = 200
+
+
+class StubTree:
+    # Just enough of ttk.Treeview for update_treeview and render_treeview
+    def __init__(self, height=600):
+        self.items = {}
+        self.next_id = 0
+        self.height = height
+
+    def get_children(self):
+        return tuple(self.items)
+
+    def delete(self, *items):
+        for item in items:
+            del self.items[item]
+
+    def insert(self, parent, index, values=()):
+        self.next_id += 1
+        item = f"I{self.next_id:03X}"
+        self.items[item] = list(values)
+        return item
+
+    def item(self, item, values=()):
+        self.items[item] = list(values)
+
+    def heading(self, column, text=""):
+        pass
+
+    def column(self, column, width=None):
+        pass
+
+    def winfo_height(self):
+        return self.height
+
+    def __setitem__(self, key, value):
+        pass
+
+
+class StubScrollbar:
+    def set(self, first, last):
+        self.position = (first, last)
+
+
+class StubStyle:
+    def lookup(self, style, option):
+        return 25
+
+
+def dataset_paths(data_dir, rows, seed):
+    scale_dir = Path(data_dir) / f"{rows}-seed{seed}"
+    paths = {
+        "csv": scale_dir / "contacts.csv",
+        "vcf": scale_dir / "contacts.vcf",
+        "parts": [scale_dir / "parts" / f"contacts_{n}.csv" for n in range(1, MERGE_PARTS + 1)],
+    }
+    done_marker = scale_dir / ".complete"
+    if not done_marker.exists():
+        (scale_dir / "parts").mkdir(parents=True, exist_ok=True)
+        print(f"Generating {rows:,} contacts in {scale_dir}", file=sys.stderr)
+        datasets.write_csv(paths["csv"], rows, seed)
+        datasets.write_vcf(paths["vcf"], rows, seed)
+        datasets.write_split_csv(scale_dir / "parts", rows, MERGE_PARTS, seed)
+        done_marker.touch()
+    paths["parquet"] = scale_dir / "contacts.parquet"
+    if not paths["parquet"].exists() and importlib.util.find_spec("pyarrow"):
+        # Saved the way the editor saves a session, so loading it is what gets measured
+        engine = load_engine(uses_pandas=True)
+        engine.write_frames([engine.read_csv_file(paths["csv"])], paths["parquet"])
+    return paths
+
+
+def run_update_treeview(app, part_paths):
+    import pandas as pd
+
+    editor = app.CombinedCSVApp.__new__(app.CombinedCSVApp)
+    editor.tree = StubTree()
+    editor.tree_scrollbar = StubScrollbar()
+    editor.style = StubStyle()
+    editor.tree_offset = 0
+    editor.dfs = [pd.read_csv(path) for path in part_paths]
+
+    start = time.perf_counter()
+    editor.update_treeview()
+    first_paint = time.perf_counter() - start
+    for step in range(SCROLL_STEPS):
+        editor.scroll_treeview("moveto", step / SCROLL_STEPS)
+    return editor.tree_total_rows, {
+        "first_paint_seconds": round(first_paint, 4),
+        "scroll_steps": SCROLL_STEPS,
+    }
+
+
+def run_case(case, data_dir, rows, seed):
+    paths = dataset_paths(data_dir, rows, seed)
+    engine = load_engine(case in PANDAS_CASES)
+    extra = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        if case == "csv_to_vcf":
+            input_bytes = os.path.getsize(paths["csv"])
+        elif case == "load_parquet":
+            input_bytes = os.path.getsize(paths["parquet"])
+        elif case.startswith("load_csv"):
+            input_bytes = os.path.getsize(paths["csv"])
+        elif case.startswith("vcf_to_csv"):
+            input_bytes = os.path.getsize(paths["vcf"])
+            # Force one parser or the other, whatever the file's content would pick
+            engine.VCF_MMAP_THRESHOLD = 0 if case == "vcf_to_csv_mmap" else float("inf")
+            engine.VCF_MMAP_MIN_SKIPPED_SHARE = 0
+        else:
+            input_bytes = sum(os.path.getsize(path) for path in paths["parts"])
+
+        start = time.perf_counter()
+        if case == "update_treeview":
+            # Loading the frames is not part of the measurement, only the first paint
+            count, extra = run_update_treeview(load_app_module(), paths["parts"])
+            start = time.perf_counter() - extra["first_paint_seconds"]
+        elif case == "csv_to_vcf":
+            count = engine.stream_csv_to_vcf(paths["csv"], Path(tmp) / "out.vcf")
+        elif case.startswith("vcf_to_csv"):
+            count = engine.stream_vcf_to_csv(paths["vcf"], Path(tmp) / "out.csv")
+        elif case.startswith("load_"):
+            source = paths["parquet"] if case == "load_parquet" else paths["csv"]
+            dfs, _, errors = engine.read_csv_files([source], compact=case != "load_csv")
+            if errors:
+                raise RuntimeError(errors[0])
+            count = len(dfs[0])
+            extra["frame_mb"] = round(dfs[0].memory_usage(deep=True).sum() / 2**20, 1)
+        elif case == "merge_in_memory":
+            engine.merge_csv_files_in_memory(paths["parts"], Path(tmp) / "merged.csv")
+            count = rows
+        elif case == "merge_streaming":
+            engine.stream_merge_csv_files(paths["parts"], Path(tmp) / "merged.csv")
+            count = rows
+        elif case == "merge_streaming_dedup":
+            with engine.PhoneIndex() as dedup_index:
+                normalizer = engine.PhoneNormalizer(engine.DEFAULT_COUNTRY_CODE)
+                engine.stream_merge_csv_files(paths["parts"], Path(tmp) / "merged.csv", None, dedup_index, normalizer)
+                extra["duplicates"] = sum(dedup_index.duplicates.values())
+            count = rows
+        elif case == "merge_sorted":
+            engine.sorted_merge_csv_files(paths["parts"], Path(tmp) / "merged.csv", sort_by="phone")
+            count = rows
+        elapsed = time.perf_counter() - start
+
+    return dict({
+        "case": case,
+        "rows": rows,
+        "count": count,
+        "seconds": round(elapsed, 4),
+        "rows_per_sec": round(count / elapsed) if elapsed else None,
+        "mb_per_sec": round(input_bytes / 2**20 / elapsed, 1) if elapsed else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }, **extra)
+
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(scales, cases, data_dir, seed):
+    results = []
+    for rows in scales:
+        subprocess.run([sys.executable, __file__, "--generate", "--rows", str(rows),
+                        "--seed", str(seed), "--data-dir", str(data_dir)], check=True)
+        for case in cases:
+            completed = subprocess.run(
+                [sys.executable, __file__, "--child", case, "--rows", str(rows),
+                 "--seed", str(seed), "--data-dir", str(data_dir)],
+                capture_output=True, text=True,
+            )
+            if completed.returncode:
+                print(f"{case} at {rows:,} rows failed:\n{completed.stderr}", file=sys.stderr)
+                continue
+            result = json.loads(completed.stdout)
+            results.append(result)
+            print(f"{case:>22} {rows:>10,} rows: {result['seconds']:>9} s, "
+                  f"{result['rows_per_sec']} rows/s, peak RSS {result['peak_rss_mb']} MB")
+    return results
+
+
+def compare(baseline_path, current_path):
+    with open(baseline_path) as file:
+        baseline = {(r["case"], r["rows"]): r for r in json.load(file)["results"]}
+    with open(current_path) as file:
+        current = json.load(file)["results"]
+    print(f"{'case':>22} {'rows':>10} {'seconds':>19} {'speedup':>8} {'peak RSS MB':>17}")
+    for result in current:
+        before = baseline.get((result["case"], result["rows"]))
+        if before is None:
+            continue
+        speedup = before["seconds"] / result["seconds"] if result["seconds"] else float("inf")
+        print(f"{result['case']:>22} {result['rows']:>10,} "
+              f"{before['seconds']:>9} -> {result['seconds']:<9} {speedup:>7.2f}x "
+              f"{before['peak_rss_mb']} -> {result['peak_rss_mb']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scales", default="10k,100k",
+                        help="comma separated row counts, e.g. 10k,100k,1M,10M")
+    parser.add_argument("--cases", default=",".join(CASES), help="comma separated subset of: " + ", ".join(CASES))
+    parser.add_argument("--data-dir", default=os.path.join(tempfile.gettempdir(), "csv-vcf-bench"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="JSON file for the results (default: bench-<timestamp>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CURRENT"),
+                        help="print the difference between two saved result files")
+    parser.add_argument("--child", choices=CASES, help=argparse.SUPPRESS)
+    parser.add_argument("--generate", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--rows", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+    if args.child:
+        print(json.dumps(run_case(args.child, args.data_dir, args.rows, args.seed)))
+        return
+    if args.generate:
+        dataset_paths(args.data_dir, args.rows, args.seed)
+        return
+
+    scales = [datasets.parse_scale(scale) for scale in args.scales.split(",")]
+    cases = args.cases.split(",")
+    unknown = set(cases) - set(CASES)
+    if unknown:
+        parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+
+    started = datetime.datetime.now()
+    results = run_suite(scales, cases, args.data_dir, args.seed)
+    output = args.output or f"bench-{started:%Y%m%d-%H%M%S}.json"
+    with open(output, mode='w') as file:
+        json.dump({
+            "started": started.isoformat(timespec="seconds"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "results": results,
+        }, file, indent=2)
+    print(f"Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,338 @@
+"""Command line for the CSV VCF Solution engines, for batch jobs without a display.
+
+Usage:
+    python csv_vcf_cli.py convert "exports/*.vcf" -o converted/
+    python csv_vcf_cli.py convert "exports/*.vcf" -o converted/ --incremental
+    python csv_vcf_cli.py convert contacts.csv -o shards/ --shard-contacts 5000
+    python csv_vcf_cli.py watch incoming/ -o converted/
+    python csv_vcf_cli.py merge "parts/*.csv" -o merged.csv --streaming --dedup
+    python csv_vcf_cli.py merge "parts/*.csv" -o sorted.csv --sort-by phone
+    python csv_vcf_cli.py make numbers.txt -o contacts.csv --prefix "BET GROUP 1"
+    python csv_vcf_cli.py make "lists/*.txt" -o contacts.vcf --prefix "BET GROUP 1"
+    python csv_vcf_cli.py rename "lists/*.csv" -o renamed.csv --prefix Client --start 1
+    python csv_vcf_cli.py merge "parts/*.csv" -o contacts.parquet
+
+Inputs may be files, directories or glob patterns (quote them so the shell
+does not expand them; ** matches subdirectories). Progress goes to stderr one
+line at a time, so the output stays readable in nohup.out. Failures print a
+one-line "error: ..." and exit with status 1 (2 for bad arguments or inputs).
+"""
+import argparse
+import contextlib
+import functools
+import glob
+import os
+import sys
+import time
+
+from csv_vcf_engine import (
+    DEFAULT_CONVERSION_WORKERS, DEFAULT_COUNTRY_CODE, SORT_KEYS, WATCH_POLL_INTERVAL, WATCH_SETTLE_SECONDS, FolderWatcher,
+    OperationMetrics, PhoneIndex, ShardLimits,
+    PhoneNormalizer, convert_files_incremental, is_columnar_path, convert_files_parallel, default_metrics_log_path, filter_frames,
+    format_duration, merge_csv_files_in_memory, merge_sort_key,
+    profile_call, read_csv_files, rename_frames, sorted_merge_csv_files, stream_make_contacts, stream_merge_csv_files, write_frames,
+)
+
+# Seconds between progress lines
+PROGRESS_INTERVAL = 5
+INPUT_EXTENSIONS = {"csv2vcf": ".csv", "vcf2csv": ".vcf"}
+# Inputs the merge and rename commands accept; Parquet and Arrow need pyarrow
+TABLE_EXTENSIONS = (".csv", ".parquet", ".arrow", ".feather")
+
+
+class CommandError(Exception):
+    pass
+
+
+class ConsoleProgress:
+    # progress(done, total, unit) callable for the engines, printing at most one line per interval
+    def __init__(self, name, quiet=False):
+        self.name = name
+        self.quiet = quiet
+        self.started_at = time.perf_counter()
+        self.last_print = self.started_at
+
+    def __call__(self, done, total=None, unit="items"):
+        now = time.perf_counter()
+        if self.quiet or now - self.last_print < PROGRESS_INTERVAL:
+            return
+        self.last_print = now
+        rate = done / (now - self.started_at)
+        text = f"{done:,} of {total:,} {unit}" if total else f"{done:,} {unit}"
+        if rate:
+            text += f" - {rate:,.0f} {unit}/s"
+            if total:
+                text += f" - ETA {format_duration((total - done) / rate)}"
+        print(f"{self.name}: {text}", file=sys.stderr, flush=True)
+
+    def finish(self):
+        if not self.quiet:
+            elapsed = format_duration(time.perf_counter() - self.started_at)
+            print(f"{self.name} finished in {elapsed}", file=sys.stderr, flush=True)
+
+
+def expand_inputs(patterns, extensions):
+    # Directories contribute their files with a matching extension; duplicates are dropped
+    paths = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, name) for name in sorted(os.listdir(pattern))]
+            matches = [path for path in matches if os.path.isfile(path) and path.lower().endswith(extensions)]
+        else:
+            matches = sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+        if not matches:
+            raise CommandError(f"no input files match {pattern!r}")
+        paths.extend(matches)
+    return list(dict.fromkeys(paths))
+
+
+def make_normalizer(args):
+    return PhoneNormalizer(args.country_code) if args.normalize else None
+
+
+def make_shard_limits(args):
+    if not (args.shard_contacts or args.shard_mb):
+        return None
+    try:
+        return ShardLimits(args.shard_contacts, args.shard_mb)
+    except ValueError as e:
+        raise CommandError(str(e))
+
+
+def print_reports(*stages):
+    for stage in stages:
+        if stage is not None:
+            print(stage.summary())
+
+
+def run_convert(args):
+    paths = expand_inputs(args.inputs, (".csv", ".vcf"))
+    if args.to:
+        mode = "csv2vcf" if args.to == "vcf" else "vcf2csv"
+        groups = {mode: [path for path in paths if path.lower().endswith(INPUT_EXTENSIONS[mode])]}
+    else:
+        # The direction follows each file's extension
+        groups = {mode: [path for path in paths if path.lower().endswith(extension)]
+                  for mode, extension in INPUT_EXTENSIONS.items()}
+    groups = {mode: files for mode, files in groups.items() if files}
+    if not groups:
+        raise CommandError("no .csv or .vcf files to convert")
+
+    shard_limits = make_shard_limits(args)
+    os.makedirs(args.output_dir, exist_ok=True)
+    normalizer = make_normalizer(args)
+    failed = 0
+    with PhoneIndex(args.country_code) if args.dedup else contextlib.nullcontext() as dedup_index:
+        for mode, files in groups.items():
+            progress = ConsoleProgress(f"Converting {len(files)} file(s) ({mode})", args.quiet)
+            skipped = []
+            if args.incremental or args.force:
+                results, skipped = convert_files_incremental(files, args.output_dir, mode, args.workers, progress,
+                                                             dedup_index, normalizer, args.metrics, args.force, shard_limits)
+            else:
+                results = convert_files_parallel(files, args.output_dir, mode, args.workers, progress,
+                                                 dedup_index, normalizer, args.metrics, shard_limits)
+            progress.finish()
+            skipped = set(skipped)
+            for file_path, output_path, error in results:
+                if file_path in skipped:
+                    print(f"{file_path} unchanged, kept {output_path}")
+                elif error is None:
+                    print(f"{file_path} -> {output_path}")
+                else:
+                    failed += 1
+                    print(f"FAILED {file_path}: {error}", file=sys.stderr)
+        print_reports(dedup_index, normalizer)
+    return 1 if failed else 0
+
+
+def run_watch(args):
+    if not os.path.isdir(args.input_dir):
+        raise CommandError(f"{args.input_dir!r} is not a directory")
+    try:
+        watcher = FolderWatcher(args.input_dir, args.output_dir, args.workers, make_normalizer(args), make_shard_limits(args),
+                                args.settle, args.interval, native=not args.polling)
+    except ValueError as e:
+        raise CommandError(str(e))
+
+    def on_result(file_path, output_path, error, unchanged):
+        if error is not None:
+            print(f"FAILED {file_path}: {error}", file=sys.stderr, flush=True)
+        elif not unchanged:
+            print(f"{file_path} -> {output_path}", flush=True)
+
+    if not args.quiet:
+        print(f"Watching {args.input_dir}, press Ctrl+C to stop", file=sys.stderr, flush=True)
+    watcher.run(None, on_result, args.metrics)
+    return 0
+
+
+def run_merge(args):
+    paths = sorted(expand_inputs(args.inputs, TABLE_EXTENSIONS), key=merge_sort_key)
+    if (args.streaming or args.sort_by) and any(is_columnar_path(path) for path in [*paths, args.output]):
+        raise CommandError("--streaming and --sort-by only merge CSV files into a CSV file")
+    if args.sort_by:
+        merge = functools.partial(sorted_merge_csv_files, sort_by=args.sort_by)
+    else:
+        merge = stream_merge_csv_files if args.streaming else merge_csv_files_in_memory
+    normalizer = make_normalizer(args)
+    progress = ConsoleProgress(f"Merging {len(paths)} file(s)", args.quiet)
+    with PhoneIndex(args.country_code) if args.dedup else contextlib.nullcontext() as dedup_index:
+        merge(paths, args.output, progress, dedup_index, normalizer, args.metrics)
+        progress.finish()
+        print(f"Merged CSV file saved as: {args.output}")
+        print_reports(dedup_index, normalizer)
+    return 0
+
+
+def run_make(args):
+    # Numbers are streamed from the files in chunks, so lists of any length fit in memory
+    paths = expand_inputs(args.inputs, (".txt", ".csv"))
+    normalizer = make_normalizer(args)
+    progress = ConsoleProgress("Creating contacts", args.quiet)
+    count = stream_make_contacts(paths, args.output, args.prefix, args.start, normalizer, progress, args.metrics)
+    progress.finish()
+    print(f"{count:,} contacts saved as: {args.output}")
+    print_reports(normalizer)
+    return 0
+
+
+def run_rename(args):
+    paths = expand_inputs(args.inputs, TABLE_EXTENSIONS)
+    progress = ConsoleProgress(f"Renaming {len(paths)} file(s)", args.quiet)
+    dfs, sources, errors = read_csv_files(paths, progress, args.metrics)
+    for error in errors:
+        print(error, file=sys.stderr)
+    if not dfs:
+        raise CommandError("no CSV files could be loaded")
+
+    rename_frames(dfs, args.prefix, args.start, args.metrics)
+    with PhoneIndex(args.country_code) if args.dedup else contextlib.nullcontext() as dedup_index:
+        if dedup_index is not None:
+            dfs = filter_frames(dfs, sources, dedup_index, None, args.metrics)
+        write_frames(dfs, args.output, progress, args.metrics)
+        progress.finish()
+        print(f"Renamed {sum(len(df) for df in dfs):,} rows, saved as: {args.output}")
+        print_reports(dedup_index)
+    return 1 if errors else 0
+
+
+def add_phone_options(parser):
+    parser.add_argument("--dedup", action="store_true",
+                        help="drop rows whose phone number was already seen, compared in E.164 form")
+    parser.add_argument("--normalize", action="store_true",
+                        help="normalize phone numbers to E.164 and drop invalid ones")
+    parser.add_argument("--country-code", default=DEFAULT_COUNTRY_CODE,
+                        help=f"country code added to national numbers (default {DEFAULT_COUNTRY_CODE})")
+
+
+def add_shard_options(parser):
+    parser.add_argument("--shard-contacts", type=int, metavar="N",
+                        help="split each VCF output into name_0001.vcf, ... of at most N contacts, listed in name_index.csv")
+    parser.add_argument("--shard-mb", type=float, metavar="MB", help="split each VCF output into files of at most MB megabytes")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-q", "--quiet", action="store_true", help="do not print progress or timings")
+    parser.add_argument("--metrics-log", default=default_metrics_log_path(),
+                        help="append the run's timings as a JSON line to this file (default %(default)s)")
+    parser.add_argument("--profile", metavar="PATH", help="run under cProfile and save the stats to PATH")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    convert = commands.add_parser("convert", help="convert CSV files to VCF and VCF files to CSV")
+    convert.add_argument("inputs", nargs="+", help="files, directories or glob patterns")
+    convert.add_argument("-o", "--output-dir", required=True)
+    convert.add_argument("--to", choices=["vcf", "csv"], help="only convert files to this format")
+    convert.add_argument("--workers", type=int, default=DEFAULT_CONVERSION_WORKERS,
+                         help=f"parallel worker processes (default {DEFAULT_CONVERSION_WORKERS})")
+    add_shard_options(convert)
+    convert.add_argument("--incremental", action="store_true",
+                         help="skip files whose content and options are unchanged since the last run")
+    convert.add_argument("--force", action="store_true", help="convert every file and rebuild the incremental manifest")
+    add_phone_options(convert)
+    convert.set_defaults(run=run_convert)
+
+    watch = commands.add_parser("watch", help="convert CSV and VCF files as they arrive in a folder, until interrupted")
+    watch.add_argument("input_dir")
+    watch.add_argument("-o", "--output-dir", required=True, help="must not be the watched folder")
+    watch.add_argument("--workers", type=int, default=DEFAULT_CONVERSION_WORKERS,
+                       help=f"parallel worker processes (default {DEFAULT_CONVERSION_WORKERS})")
+    watch.add_argument("--settle", type=float, default=WATCH_SETTLE_SECONDS,
+                       help="seconds a file must stay unchanged before it is converted (default %(default)s)")
+    watch.add_argument("--interval", type=float, default=WATCH_POLL_INTERVAL,
+                       help="seconds between checks of the folder (default %(default)s)")
+    watch.add_argument("--polling", action="store_true", help="poll the folder even when watchfiles is installed")
+    watch.add_argument("--normalize", action="store_true", help="normalize phone numbers to E.164 and drop invalid ones")
+    watch.add_argument("--country-code", default=DEFAULT_COUNTRY_CODE)
+    add_shard_options(watch)
+    watch.set_defaults(run=run_watch)
+
+    merge = commands.add_parser("merge", help="merge CSV files into one, in numeric file name order")
+    merge.add_argument("inputs", nargs="+")
+    merge.add_argument("-o", "--output", required=True, help="a .csv, .parquet or .arrow file")
+    merge.add_argument("--streaming", action="store_true",
+                       help="copy rows without loading the files; all files must share one header")
+    merge.add_argument("--sort-by", choices=SORT_KEYS,
+                       help="sort all rows by name or phone number, on disk in bounded memory; "
+                            "all files must share one header")
+    add_phone_options(merge)
+    merge.set_defaults(run=run_merge)
+
+    make = commands.add_parser("make", help="create a contacts CSV or VCF from phone numbers, one per line")
+    make.add_argument("inputs", nargs="+", help="text files with one phone number per line, or CSV files with a phone column")
+    make.add_argument("-o", "--output", required=True, help="a .csv file, or .vcf for vCards")
+    make.add_argument("--prefix", required=True, help="name prefix, e.g. 'BET GROUP 1'")
+    make.add_argument("--start", type=int, default=1, help="first contact number (default 1)")
+    make.add_argument("--normalize", action=argparse.BooleanOptionalAction, default=True,
+                      help="normalize phone numbers to E.164 and drop invalid ones (default on)")
+    make.add_argument("--country-code", default=DEFAULT_COUNTRY_CODE)
+    make.set_defaults(run=run_make)
+
+    rename = commands.add_parser("rename", help="number the contacts of CSV files and save them as one file")
+    rename.add_argument("inputs", nargs="+")
+    rename.add_argument("-o", "--output", required=True, help="a .csv, .parquet or .arrow file")
+    rename.add_argument("--prefix", required=True)
+    rename.add_argument("--start", type=int, default=1)
+    rename.add_argument("--dedup", action="store_true",
+                        help="drop rows whose phone number was already seen, compared in E.164 form")
+    rename.add_argument("--country-code", default=DEFAULT_COUNTRY_CODE,
+                        help=f"country code added to national numbers when comparing them (default {DEFAULT_COUNTRY_CODE})")
+    rename.set_defaults(run=run_rename)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.metrics = OperationMetrics(args.command.capitalize())
+    args.metrics.start()
+    status = "error"
+    try:
+        if args.profile:
+            exit_code = profile_call(args.profile, args.run, args)
+        else:
+            exit_code = args.run(args)
+        if exit_code == 0:
+            status = "ok"
+        return exit_code
+    except CommandError as e:
+        print(f"error: {e}", file=sys.stderr)
+        return 2
+    except (ValueError, RuntimeError, OSError) as e:
+        # Engine errors (mismatched headers, a missing optional package, unreadable or
+        # undecodable input) are reported, not dumped as a traceback, for unattended runs
+        print(f"error: {e}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        status = "cancelled"
+        print("Interrupted.", file=sys.stderr)
+        return 130
+    finally:
+        args.metrics.finish()
+        args.metrics.log(args.metrics_log, status, profile=args.profile)
+        if not args.quiet:
+            print(args.metrics.summary(), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,2358 @@
+"""Conversion, merge and naming engines shared by the GUI and the command line.
+
+Nothing in here touches Tk: long operations take an optional
+progress(done, total, unit) callable, which the GUI uses for its progress bar
+and cancellation and the CLI for console output.
+"""
+import importlib
+import bisect
+import os
+import re
+import csv
+import io
+import codecs
+import mmap
+import locale
+import itertools
+import pickle
+import sqlite3
+import tempfile
+import contextlib
+import cProfile
+import datetime
+import hashlib
+import heapq
+import json
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+
+class LazyModule:
+    # Stands in for a heavy module and imports it on first attribute access, so
+    # importing the engines (and opening the GUI) does not wait for pandas
+    def __init__(self, name):
+        self.name = name
+
+    def __getattr__(self, attr):
+        module = importlib.import_module(self.name)
+        return getattr(module, attr)
+
+
+pd = LazyModule("pandas")
+np = LazyModule("numpy")
+
+
+def preload_heavy_modules():
+    # Called from a background thread once the window is up, so the first operation does not pay for the import
+    importlib.import_module("pandas")
+
+
+# Size of the write buffer used when streaming vCards to disk
+VCF_WRITE_BUFFER_SIZE = 1024 * 1024
+# Amount of text read per step by the streaming vCard parser
+VCF_READ_CHUNK_SIZE = 1024 * 1024
+# VCF files at least this large are sampled, and scanned through mmap at byte level when
+# at least VCF_MMAP_MIN_SKIPPED_SHARE of the sampled bytes lie outside FN/TEL/END lines.
+# Below that share (plain contact exports) the text parser is faster.
+VCF_MMAP_THRESHOLD = 8 * 1024 * 1024
+VCF_MMAP_MIN_SKIPPED_SHARE = 0.65
+VCF_MMAP_SAMPLE_SIZE = 256 * 1024
+# Default number of worker processes used by the converter tab
+DEFAULT_CONVERSION_WORKERS = os.cpu_count() or 1
+# Rows written per slice when saving DataFrames, between progress/cancel checks
+CSV_WRITE_CHUNK_ROWS = 100_000
+# Bytes copied per step by the streaming merge
+MERGE_COPY_CHUNK_SIZE = 1024 * 1024
+# Phone numbers a PhoneIndex keeps in memory before spilling to a temporary SQLite file
+PHONE_INDEX_MEMORY_KEYS = 5_000_000
+# Rows between progress reports when merging row by row
+MERGE_PROGRESS_ROWS = 10_000
+# Contacts read between progress/cancel checks when converting a CSV file
+CONVERT_PROGRESS_ROWS = 10_000
+# Country code added to national numbers by the phone normalizer unless the user changes it
+DEFAULT_COUNTRY_CODE = "254"
+# Phone numbers normalized per vectorized batch when streaming contacts
+NORMALIZE_BATCH_SIZE = 50_000
+# Contacts rendered, written or deduplicated per step by the streaming pipelines. Kept
+# small: larger batches keep enough objects alive to make garbage collection expensive
+PIPELINE_BATCH_ROWS = 256
+# Phone numbers read, named and written per chunk when the CSV Maker reads them from files
+MAKE_CHUNK_ROWS = 50_000
+# Memory the shared cache of parsed files may use, in MB, unless the environment variable is set
+FRAME_CACHE_MB = 512
+FRAME_CACHE_ENV = "CSV_VCF_CACHE_MB"
+# Where operation metrics and profiles are written unless overridden
+METRICS_LOG_ENV = "CSV_VCF_METRICS_LOG"
+METRICS_DIR = Path.home() / ".csv-vcf-solution"
+# Kept in the output directory by incremental conversions
+CONVERSION_MANIFEST_NAME = ".csv-vcf-manifest.json"
+# Bump when converter output changes, so incremental runs rebuild everything once
+CONVERSION_FORMAT_VERSION = 1
+# Bytes hashed per read when fingerprinting inputs
+HASH_CHUNK_SIZE = 1024 * 1024
+# Sharded VCF output: threads writing finished shards while the next ones are rendered,
+# and the digits in shard numbers (name_0001.vcf)
+SHARD_WRITE_WORKERS = 4
+SHARD_NUMBER_WIDTH = 4
+SHARD_INDEX_HEADER = ["File", "First Contact", "Last Contact", "From", "To", "Contacts", "Bytes"]
+# Columnar session files (need the optional pyarrow package), by extension
+COLUMNAR_FORMATS = {".parquet": "parquet", ".arrow": "arrow", ".feather": "arrow"}
+# Text columns with at most this share of distinct values are kept as categories when compacting
+CATEGORY_MAX_RATIO = 0.5
+# Folder watching: seconds between checks, and how long a new file's size and mtime
+# must hold still before it is converted, so half-copied files are left alone
+WATCH_POLL_INTERVAL = 1.0
+WATCH_SETTLE_SECONDS = 2.0
+WATCH_MODES = {".csv": "csv2vcf", ".vcf": "vcf2csv"}
+# Editor search queries with at least this many digits look up phone numbers rather than names
+PHONE_QUERY_MIN_DIGITS = 3
+# Sorted merge: rows sorted in memory per run before it is spilled to a temporary file,
+# and how many run files are merged at once (more are combined over several passes)
+SORT_RUN_ROWS = 100_000
+SORT_MAX_OPEN_RUNS = 64
+SORT_KEYS = ("name", "phone")
+
+# RFC 6350 line folding: a line break followed by a space or tab continues the previous line
+VCF_FOLD_PATTERN = re.compile(r'\r?\n[ \t]')
+# The only properties the converter needs, with optional "item1." group prefix and any
+# parameters, e.g. "FN:", "TEL;CELL:", "TEL;TYPE=CELL,VOICE:", "item1.TEL;type=pref:".
+# Anchoring on a literal newline instead of ^ lets the regex engine skip ahead quickly.
+VCF_PROPERTY_PATTERN = re.compile(r'\n(?:[A-Za-z0-9_-]+\.)?([Ff][Nn]|[Tt][Ee][Ll]|[Ee][Nn][Dd])(?:;[^:\n]*)?:([^\n]*)')
+
+# Byte-level equivalents for the mmap scanner. The file is not unfolded up front, so
+# parameters and values may span folded lines. Lines end in \n or \r\n; files using
+# bare \r line endings are left to the text parser.
+VCF_BYTES_FOLD_PATTERN = re.compile(rb'\r?\n[ \t]')
+VCF_BYTES_PROPERTY = (
+    rb'(?:[A-Za-z0-9_-]+\.)?([Ff][Nn]|[Tt][Ee][Ll]|[Ee][Nn][Dd])'
+    rb'(?:;[^:\r\n]*(?:\r?\n[ \t][^:\r\n]*)*)?'
+    rb':([^\r\n]*(?:\r?\n[ \t][^\r\n]*)*)'
+)
+VCF_BYTES_PROPERTY_PATTERN = re.compile(rb'\n' + VCF_BYTES_PROPERTY)
+VCF_BYTES_FIRST_PROPERTY_PATTERN = re.compile(VCF_BYTES_PROPERTY)
+VCF_BYTES_KEPT_LINE_PATTERN = re.compile(rb'\n(?:[A-Za-z0-9_-]+\.)?(?:[Ff][Nn]|[Tt][Ee][Ll]|[Ee][Nn][Dd])[;:][^\n]*')
+
+
+# Per-operation instrumentation: wall time, time per stage, rows, bytes and peak memory.
+# Time is charged to one stage at a time; entering a stage pauses the one running
+# (e.g. a write loop pulling its next batch from the parser), so nested stages are
+# never counted twice. Stages are entered once per batch, not per row, and must not
+# span a yield, or the consumer's time would be charged to them.
+# The OS only keeps a process-lifetime memory high-water mark. On Linux it is reset when
+# an operation starts (unless another one is running, whose peak that would erase), so
+# the peak is the operation's own. Elsewhere, a high-water mark that rose during the
+# operation was set by it; one that did not is only the process's peak and is labelled
+# so. Worker processes' peak is only reported when it rose during the operation.
+METRIC_STAGES = ("read", "parse", "transform", "render", "write")
+
+
+class OperationMetrics:
+    running = 0  # Operations started and not yet finished, across threads
+    running_lock = threading.Lock()
+
+    def __init__(self, operation=None, enabled=True):
+        self.operation = operation
+        self.enabled = enabled
+        self.stages = dict.fromkeys(METRIC_STAGES, 0.0)
+        self.rows = 0  # Rows written
+        self.rows_read = 0  # Rows parsed from the input, where the input is parsed as rows
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.active = []  # Stack of the stages entered
+        self.mark = 0.0  # When time was last charged to the active stage
+        self.started = None
+        self.started_at = None
+        self.wall_seconds = None
+        self.peak_rss = None
+        self.peak_rss_scope = None  # "operation", or "process" when only the lifetime peak is known
+        self.peak_child_rss = None
+        self.peak_reset = False
+        self.start_peak_rss = None
+        self.start_peak_child_rss = None
+
+    def start(self):
+        self.started = datetime.datetime.now()
+        self.started_at = time.perf_counter()
+        with OperationMetrics.running_lock:
+            self.peak_reset = OperationMetrics.running == 0 and reset_peak_rss()
+            OperationMetrics.running += 1
+        self.start_peak_rss = peak_rss_bytes()
+        self.start_peak_child_rss = peak_rss_bytes(children=True)
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self.started_at
+        with OperationMetrics.running_lock:
+            OperationMetrics.running -= 1
+        self.peak_rss = (self.peak_reset and linux_peak_rss_bytes()) or peak_rss_bytes()
+        grew = self.peak_rss is not None and self.start_peak_rss is not None and self.peak_rss > self.start_peak_rss
+        self.peak_rss_scope = "operation" if self.peak_reset or grew else "process"
+        peak_child_rss = peak_rss_bytes(children=True)
+        if peak_child_rss and peak_child_rss > (self.start_peak_child_rss or 0):
+            self.peak_child_rss = peak_child_rss
+
+    def stage(self, name):
+        return self.timed_stage(name) if self.enabled else contextlib.nullcontext()
+
+    @contextlib.contextmanager
+    def timed_stage(self, name):
+        self.charge()
+        self.active.append(name)
+        try:
+            yield
+        finally:
+            self.charge()
+            self.active.pop()
+
+    def charge(self):
+        now = time.perf_counter()
+        if self.active:
+            self.stages[self.active[-1]] += now - self.mark
+        self.mark = now
+
+    def add(self, rows=0, bytes_read=0, bytes_written=0, rows_read=0):
+        self.rows += rows
+        self.rows_read += rows_read
+        self.bytes_read += bytes_read
+        self.bytes_written += bytes_written
+
+    def child(self):
+        # A fresh recorder for work done elsewhere (e.g. a worker process), merged back afterwards
+        return OperationMetrics(self.operation, self.enabled)
+
+    def merge(self, other):
+        for name, seconds in other.stages.items():
+            self.stages[name] += seconds
+        self.add(other.rows, other.bytes_read, other.bytes_written, other.rows_read)
+
+    def record(self, status="ok", **extra):
+        stage_seconds = sum(self.stages.values())
+        return dict({
+            "operation": self.operation,
+            "started": self.started.isoformat(timespec="seconds") if self.started else None,
+            "status": status,
+            "wall_seconds": round(self.wall_seconds or 0, 4),
+            "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            # Stage times of parallel workers add up, so this can go negative
+            "other_seconds": round((self.wall_seconds or 0) - stage_seconds, 4),
+            "rows": self.rows,
+            "rows_read": self.rows_read,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "peak_rss_mb": megabytes(self.peak_rss),
+            "peak_rss_scope": self.peak_rss_scope,
+            "peak_child_rss_mb": megabytes(self.peak_child_rss),
+        }, **extra)
+
+    def summary(self):
+        text = f"{self.operation} took {self.wall_seconds or 0:.2f} s"
+        details = []
+        if self.rows_read:
+            details.append(f"{self.rows_read:,} rows read")
+        if self.rows or self.bytes_written:
+            details.append(f"{self.rows:,} rows written")
+        if self.bytes_read:
+            details.append(f"{megabytes(self.bytes_read)} MB read")
+        if self.bytes_written:
+            details.append(f"{megabytes(self.bytes_written)} MB written")
+        if self.peak_rss:
+            label = "peak memory" if self.peak_rss_scope == "operation" else "process peak memory"
+            details.append(f"{label} {megabytes(self.peak_rss)} MB")
+        if self.peak_child_rss:
+            details.append(f"worker peak memory {megabytes(self.peak_child_rss)} MB")
+        stages = [f"{name} {seconds:.2f} s" for name, seconds in self.stages.items() if seconds >= 0.005]
+        if details:
+            text += ": " + ", ".join(details)
+        if stages:
+            text += " (" + ", ".join(stages) + ")"
+        return text
+
+    def log(self, path, status="ok", **extra):
+        # Metrics are diagnostics only; failing to write them must never fail the operation
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            with open(path, mode='a') as file:
+                file.write(json.dumps(self.record(status, **extra)) + "\n")
+        except OSError:
+            pass
+
+
+# The default for every metrics parameter: records nothing
+NO_METRICS = OperationMetrics(enabled=False)
+
+
+def megabytes(size):
+    return round(size / 2**20, 1) if size else None
+
+
+def peak_rss_bytes(children=False):
+    # Peak resident memory of this process (or of its largest finished child), None if unknown
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None if children else windows_peak_rss_bytes()
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux reports kilobytes, macOS reports bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def reset_peak_rss():
+    # Linux lets a process reset its own high-water mark (VmHWM); True if that worked
+    try:
+        with open("/proc/self/clear_refs", mode='w') as file:
+            file.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def linux_peak_rss_bytes():
+    # VmHWM: the high-water mark since the last reset_peak_rss, None if unavailable
+    try:
+        with open("/proc/self/status") as file:
+            for line in file:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def windows_peak_rss_bytes():
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [
+            ("cb", wintypes.DWORD),
+            ("PageFaultCount", wintypes.DWORD),
+            ("PeakWorkingSetSize", ctypes.c_size_t),
+            ("WorkingSetSize", ctypes.c_size_t),
+            ("QuotaPeakPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaPeakNonPagedPoolUsage", ctypes.c_size_t),
+            ("QuotaNonPagedPoolUsage", ctypes.c_size_t),
+            ("PagefileUsage", ctypes.c_size_t),
+            ("PeakPagefileUsage", ctypes.c_size_t),
+        ]
+
+    try:
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.PeakWorkingSetSize
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def default_metrics_log_path():
+    return os.environ.get(METRICS_LOG_ENV) or str(METRICS_DIR / "metrics.jsonl")
+
+
+def profile_output_path(operation):
+    name = re.sub(r'\W+', '-', operation.lower()).strip("-")
+    return str(METRICS_DIR / "profiles" / f"{name}-{datetime.datetime.now():%Y%m%d-%H%M%S}.prof")
+
+
+def profile_call(profile_path, func, *args):
+    # Runs func under cProfile and saves the stats for pstats/snakeviz. Only the calling
+    # thread is profiled, not worker processes.
+    os.makedirs(os.path.dirname(os.path.abspath(profile_path)), exist_ok=True)
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args)
+    finally:
+        profiler.dump_stats(profile_path)
+
+
+# Streaming CSV -> VCF pipeline: read row -> render card -> buffered write.
+# Contacts flow through in batches of PIPELINE_BATCH_ROWS so memory stays flat no
+# matter how large the input file is.
+def iter_csv_contacts(csv_path, progress=None):
+    # progress(done, total, "KB") is called every CONVERT_PROGRESS_ROWS rows and may raise to cancel
+    total = os.path.getsize(csv_path) // 1024
+    with open(csv_path, mode='r', newline='') as file:
+        csv_reader = csv.reader(file)
+        next(csv_reader, None)  # Skip header row
+
+        for i, row in enumerate(csv_reader, 1):
+            if progress and i % CONVERT_PROGRESS_ROWS == 0:
+                progress(file.buffer.tell() // 1024, total, "KB")
+            if len(row) >= 2:
+                name = row[0].strip()
+                phone_numbers = [num.strip() for num in row[1:] if num.strip()]
+                yield name, phone_numbers
+
+
+def render_vcard(name, phone_numbers):
+    lines = ["BEGIN:VCARD", "VERSION:2.1", f"N:;{name};;;", f"FN:{name}"]
+    lines.extend(f"TEL;CELL:{phone}" for phone in phone_numbers)
+    lines.append("END:VCARD\n")
+    return "\n".join(lines)
+
+
+def remove_partial_output(output_path):
+    # Called when a streaming write fails part-way so no truncated file is left behind
+    try:
+        os.remove(output_path)
+    except OSError:
+        pass
+
+
+def write_vcards(contacts, output_path, metrics=NO_METRICS):
+    # Pulling a batch runs the upstream generators, which is parsing unless they enter a stage of their own
+    count = 0
+    contacts = iter(contacts)
+    try:
+        with open(output_path, mode='w', buffering=VCF_WRITE_BUFFER_SIZE) as file:
+            while True:
+                with metrics.stage("parse"):
+                    batch = list(itertools.islice(contacts, PIPELINE_BATCH_ROWS))
+                if not batch:
+                    break
+                with metrics.stage("render"):
+                    text = "".join([render_vcard(name, phone_numbers) for name, phone_numbers in batch])
+                with metrics.stage("write"):
+                    file.write(text)
+                count += len(batch)
+    except BaseException:
+        remove_partial_output(output_path)
+        raise
+    metrics.add(rows=count)
+    return count
+
+
+def stream_csv_to_vcf(csv_path, output_path, dedup_index=None, normalizer=None, metrics=NO_METRICS, progress=None):
+    contacts = iter_csv_contacts(csv_path, progress)
+    if normalizer is not None:
+        contacts = normalizer.filter_contacts(contacts, csv_path, metrics)
+    if dedup_index is not None:
+        contacts = dedup_index.filter_contacts(contacts, csv_path, metrics)
+    count = write_vcards(contacts, output_path, metrics)
+    metrics.add(bytes_read=os.path.getsize(csv_path), bytes_written=os.path.getsize(output_path))
+    return count
+
+
+# Sharded CSV -> VCF output. Instead of one VCF per CSV the cards are split into
+# name_0001.vcf, name_0002.vcf, ... of at most a number of contacts and/or bytes, and
+# name_index.csv lists which contacts each shard holds. Boundaries are decided card by
+# card in input order, so the same input and limits always give the same files. Shards
+# are written by a small thread pool while the next one is being rendered.
+class ShardLimits:
+    def __init__(self, max_contacts=None, max_mb=None):
+        if not max_contacts and not max_mb:
+            raise ValueError("Give a contact count or a size in MB for the shards.")
+        if (max_contacts is not None and max_contacts < 0) or (max_mb is not None and max_mb < 0):
+            raise ValueError("Shard limits must be positive.")
+        self.max_contacts = max_contacts or None
+        self.max_bytes = int(max_mb * 2**20) if max_mb else None
+
+    def is_full(self, contacts, size, next_size):
+        # A card larger than the byte limit still gets a shard of its own
+        if self.max_contacts is not None and contacts >= self.max_contacts:
+            return True
+        return self.max_bytes is not None and contacts > 0 and size + next_size > self.max_bytes
+
+    def options(self):
+        return {"max_contacts": self.max_contacts, "max_bytes": self.max_bytes}
+
+
+def shard_index_path(output_path):
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}_index.csv")
+
+
+def shard_path(output_path, number):
+    output_path = Path(output_path)
+    return output_path.with_name(f"{output_path.stem}_{number:0{SHARD_NUMBER_WIDTH}d}{output_path.suffix}")
+
+
+def read_shard_index(index_path):
+    # Shard file names listed by a previous run, so shards it no longer produces can be removed
+    try:
+        with open(index_path, mode='r', newline='') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            return [row[0] for row in reader if row]
+    except OSError:
+        return []
+
+
+def write_text_file(path, text, encoding):
+    with open(path, mode='w', buffering=VCF_WRITE_BUFFER_SIZE, encoding=encoding) as file:
+        file.write(text)
+
+
+def stream_csv_to_vcf_shards(csv_path, output_path, limits, dedup_index=None, normalizer=None, metrics=NO_METRICS,
+                             progress=None):
+    # Returns the number of contacts written. output_path names the unsharded file
+    # (name.vcf); the shards and the index are written next to it.
+    contacts = iter_csv_contacts(csv_path, progress)
+    if normalizer is not None:
+        contacts = normalizer.filter_contacts(contacts, csv_path, metrics)
+    if dedup_index is not None:
+        contacts = dedup_index.filter_contacts(contacts, csv_path, metrics)
+    contacts = iter(contacts)
+
+    # Sizes are counted in the bytes that end up on disk, newline translation included
+    encoding = locale.getpreferredencoding(False)
+    newline_extra = len(os.linesep) - 1
+    index_path = shard_index_path(output_path)
+    previous_shards = read_shard_index(index_path)
+
+    shards = []  # One SHARD_INDEX_HEADER row per shard
+    pending = deque()
+    cards, size, first_name, last_name = [], 0, None, None
+    count = 0
+    bytes_written = 0
+    executor = ThreadPoolExecutor(max_workers=SHARD_WRITE_WORKERS)
+
+    def flush():
+        nonlocal cards, size, bytes_written
+        path = shard_path(output_path, len(shards) + 1)
+        shards.append([path.name, first_name, last_name, count - len(cards) + 1, count, len(cards), size])
+        pending.append(executor.submit(write_text_file, path, "".join(cards), encoding))
+        bytes_written += size
+        cards, size = [], 0
+        # At most SHARD_WRITE_WORKERS shards wait in memory
+        with metrics.stage("write"):
+            while len(pending) > SHARD_WRITE_WORKERS:
+                pending.popleft().result()
+
+    try:
+        while True:
+            with metrics.stage("parse"):
+                batch = list(itertools.islice(contacts, PIPELINE_BATCH_ROWS))
+            if not batch:
+                break
+            with metrics.stage("render"):
+                for name, phone_numbers in batch:
+                    card = render_vcard(name, phone_numbers)
+                    card_size = len(card) if card.isascii() else len(card.encode(encoding, "replace"))
+                    if newline_extra:
+                        card_size += card.count("\n") * newline_extra
+                    if limits.is_full(len(cards), size, card_size):
+                        flush()
+                    if not cards:
+                        first_name = name
+                    cards.append(card)
+                    size += card_size
+                    last_name = name
+                    count += 1
+        if cards or not shards:
+            flush()
+        with metrics.stage("write"):
+            while pending:
+                pending.popleft().result()
+            with open(index_path, mode='w', newline='') as file:
+                writer = csv.writer(file)
+                writer.writerow(SHARD_INDEX_HEADER)
+                writer.writerows(shards)
+    except BaseException:
+        executor.shutdown(cancel_futures=True)
+        for row in shards:
+            remove_partial_output(Path(output_path).with_name(row[0]))
+        remove_partial_output(index_path)
+        raise
+    executor.shutdown()
+
+    # Shards left over from an earlier run that produced more of them
+    current = {row[0] for row in shards}
+    prefix = Path(output_path).stem + "_"
+    for name in previous_shards:
+        if name not in current and name == os.path.basename(name) and name.startswith(prefix):
+            remove_partial_output(Path(output_path).with_name(name))
+    metrics.add(rows=count, bytes_read=os.path.getsize(csv_path), bytes_written=bytes_written)
+    return count
+
+
+# Streaming VCF -> CSV pipeline. The parser reads fixed-size chunks, unfolds
+# continuation lines and only materializes the FN/TEL/END lines it needs, so
+# memory is bounded by the chunk size rather than the file size.
+def iter_vcf_blocks(file, metrics=NO_METRICS, progress=None):
+    # Every block starts with the newline that ends the previous one. progress(done,
+    # total, "KB") is called after every chunk read and may raise to cancel.
+    total = os.fstat(file.fileno()).st_size // 1024 if progress else None
+    tail = "\n"
+    while True:
+        with metrics.stage("read"):
+            chunk = file.read(VCF_READ_CHUNK_SIZE)
+        if progress:
+            progress(file.buffer.tell() // 1024, total, "KB")
+        if not chunk:
+            if len(tail) > 1:
+                yield tail
+            return
+
+        text = tail + chunk
+        if "\n " in text or "\n\t" in text:
+            text = VCF_FOLD_PATTERN.sub("", text)
+        # A newline at the very end may still be followed by a continuation in the
+        # next chunk, so hold back everything after the last newline we can resolve
+        cut = text.rfind("\n", 0, len(text) - 1)
+        if cut == -1:
+            tail = text
+            continue
+        yield text[:cut]
+        tail = text[cut:]
+
+
+def collect_vcf_contacts(property_batches):
+    name = None
+    phone_numbers = []
+    for properties in property_batches:
+        for prop, value in properties:
+            prop = prop.upper()
+            value = value.strip()
+            if prop == "FN":
+                name = value
+            elif prop == "TEL":
+                if value[:4].lower() == "tel:":  # vCard 4.0 URI values
+                    value = value[4:]
+                phone_numbers.append(value)
+            elif value.upper() == "VCARD":
+                if name is not None and phone_numbers:
+                    yield name, phone_numbers
+                name = None
+                phone_numbers = []
+
+
+def parse_vcf_stream(file, metrics=NO_METRICS, progress=None):
+    return collect_vcf_contacts(VCF_PROPERTY_PATTERN.findall(block) for block in iter_vcf_blocks(file, metrics, progress))
+
+
+# Fast path for very large files: scan the raw bytes through mmap and decode only
+# the FN/TEL/END values that are extracted, never building a string per line.
+def iter_vcf_mmap_windows(buffer):
+    size = len(buffer)
+    pos = 0
+    while pos < size:
+        # End each window on a newline that is not followed by a continuation line
+        end = buffer.find(b"\n", pos + VCF_READ_CHUNK_SIZE)
+        while end != -1 and buffer[end + 1:end + 2] in (b" ", b"\t"):
+            end = buffer.find(b"\n", end + 1)
+        if end == -1:
+            end = size
+        yield pos, end
+        pos = end
+
+
+def decode_vcf_properties(properties, encoding):
+    # Decode a whole window of matches with one join/decode/split instead of one
+    # decode call per value; values containing NUL fall back to the slow path.
+    if not properties:
+        return []
+    props, values = zip(*properties)
+    joined = b"\0".join(values)
+    if b"\n" in joined:
+        joined = VCF_BYTES_FOLD_PATTERN.sub(b"", joined)
+    decoded = joined.decode(encoding).split("\0")
+    if len(decoded) != len(values):
+        decoded = [VCF_BYTES_FOLD_PATTERN.sub(b"", value).decode(encoding) for value in values]
+    return zip(b"\0".join(props).decode("ascii").split("\0"), decoded)
+
+
+def scan_vcf_mmap(buffer, encoding, progress=None):
+    first = VCF_BYTES_FIRST_PROPERTY_PATTERN.match(buffer)
+    if first:
+        yield decode_vcf_properties([first.groups()], encoding)
+    for start, end in iter_vcf_mmap_windows(buffer):
+        yield decode_vcf_properties(VCF_BYTES_PROPERTY_PATTERN.findall(buffer, start, end), encoding)
+        if progress:
+            progress(end // 1024, len(buffer) // 1024, "KB")
+
+
+def uses_bare_cr_line_endings(buffer):
+    cr = buffer.find(b"\r")
+    return cr != -1 and buffer[cr + 1:cr + 2] != b"\n"
+
+
+def vcf_skipped_share(buffer):
+    # Share of the bytes outside FN/TEL/END lines, sampled at the start, middle and end.
+    # The byte scanner wins by never decoding those bytes, so it only pays off when most
+    # of the file is photos, notes and the like.
+    size = len(buffer)
+    starts = {0, max(0, (size - VCF_MMAP_SAMPLE_SIZE) // 2), max(0, size - VCF_MMAP_SAMPLE_SIZE)}
+    sampled = kept = 0
+    for start in starts:
+        sample = buffer[start:start + VCF_MMAP_SAMPLE_SIZE]
+        sampled += len(sample)
+        kept += sum(len(line) for line in VCF_BYTES_KEPT_LINE_PATTERN.findall(sample))
+    return 1 - kept / sampled if sampled else 0.0
+
+
+def iter_vcf_contacts(vcf_path, metrics=NO_METRICS, progress=None):
+    # The byte scanner needs an ASCII-compatible encoding (not UTF-16/32), a file big
+    # enough for mmap to pay off and mostly data it can skip; otherwise the text parser is used.
+    # Either reports how far it has read through progress(done, total, "KB").
+    encoding = locale.getpreferredencoding(False)
+    if os.path.getsize(vcf_path) >= VCF_MMAP_THRESHOLD and "\n:;".encode(encoding) == b"\n:;":
+        with open(vcf_path, mode='rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            if not uses_bare_cr_line_endings(buffer) and vcf_skipped_share(buffer) >= VCF_MMAP_MIN_SKIPPED_SHARE:
+                yield from collect_vcf_contacts(scan_vcf_mmap(buffer, encoding, progress))
+                return
+
+    with open(vcf_path, mode='r') as file:
+        yield from parse_vcf_stream(file, metrics, progress)
+
+
+def write_csv_contacts(contacts, output_path, metrics=NO_METRICS):
+    # Rows are formatted into a memory buffer per batch, so rendering and writing are timed apart
+    count = 0
+    contacts = iter(contacts)
+    buffer = io.StringIO()
+    csv_writer = csv.writer(buffer)
+    try:
+        with open(output_path, mode='w', newline='') as file:
+            csv_writer.writerow(["Name", "Phone Number 1", "Phone Number 2"])
+            while True:
+                with metrics.stage("parse"):
+                    batch = list(itertools.islice(contacts, PIPELINE_BATCH_ROWS))
+                with metrics.stage("render"):
+                    csv_writer.writerows([[name] + phone_numbers[:2] + [''] * (2 - len(phone_numbers))
+                                          for name, phone_numbers in batch])
+                with metrics.stage("write"):
+                    file.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+                if not batch:
+                    break
+                count += len(batch)
+    except BaseException:
+        remove_partial_output(output_path)
+        raise
+    metrics.add(rows=count)
+    return count
+
+
+def stream_vcf_to_csv(vcf_path, output_path, dedup_index=None, normalizer=None, metrics=NO_METRICS, progress=None):
+    contacts = iter_vcf_contacts(vcf_path, metrics, progress)
+    if normalizer is not None:
+        contacts = normalizer.filter_contacts(contacts, vcf_path, metrics)
+    if dedup_index is not None:
+        contacts = dedup_index.filter_contacts(contacts, vcf_path, metrics)
+    count = write_csv_contacts(contacts, output_path, metrics)
+    metrics.add(bytes_read=os.path.getsize(vcf_path), bytes_written=os.path.getsize(output_path))
+    return count
+
+
+# Phone number normalization to E.164 ("+<country code><number>"), done with pandas
+# string operations over a whole column at a time:
+#   "+254 712 345-678" -> international, punctuation stripped
+#   "00254712345678"   -> international via the 00 exit code
+#   "0712345678"       -> national with trunk 0, country code added
+#   "712345678"        -> national (at most NATIONAL_NUMBER_MAX_DIGITS), country code added
+# Anything with letters or other symbols, or outside 8-15 digits, is rejected, and so is
+# a national number shorter than NATIONAL_NUMBER_MIN_DIGITS (after any trunk 0): with the
+# country code prepended "12345" would otherwise pass as +25412345.
+PHONE_ALLOWED_PATTERN = r'^\+?[\d\s().\-/]+$'
+NATIONAL_NUMBER_MIN_DIGITS = 7
+NATIONAL_NUMBER_MAX_DIGITS = 10
+
+
+def phone_text(phones):
+    # Numbers read as floats (numeric columns with missing values) are printed as integers
+    phones = pd.Series(phones)
+    if pd.api.types.is_float_dtype(phones.dtype):
+        try:
+            phones = phones.astype("Int64")
+        except (TypeError, ValueError):
+            pass
+    elif phones.dtype == object:
+        # Converted to text here: mapped back to ints, pandas may infer a float column again
+        phones = phones.map(lambda value: str(int(value)) if isinstance(value, float) and value.is_integer() else value)
+    return phones.astype(str).where(phones.notna(), "").str.strip()
+
+
+def normalize_phone_numbers(phones, country_code=DEFAULT_COUNTRY_CODE):
+    # Returns (normalized, rejected): normalized holds E.164 strings with NaN for blank
+    # or invalid entries, rejected flags the non-blank entries that were invalid
+    country_code = NON_DIGIT_PATTERN.sub("", country_code or "")
+    text = phone_text(phones)
+    blank = text.eq("")
+    digits = text.str.replace(r'\D', '', regex=True)
+
+    international = text.str.startswith("+")
+    exit_code = ~international & digits.str.startswith("00")
+    trunk = ~international & ~exit_code & digits.str.startswith("0")
+    national = ~international & ~exit_code & ~trunk & (digits.str.len() <= NATIONAL_NUMBER_MAX_DIGITS)
+
+    full = digits.copy()
+    full[exit_code] = digits[exit_code].str[2:]
+    full[trunk] = country_code + digits[trunk].str[1:]
+    full[national] = country_code + digits[national]
+
+    valid = (
+        text.str.match(PHONE_ALLOWED_PATTERN).fillna(False).astype(bool)
+        & full.str.len().between(8, 15)
+        & ~full.str.startswith("0")
+    )
+    national_length = digits.str.len() - trunk.astype(int)
+    valid &= ~((trunk | national) & (national_length < NATIONAL_NUMBER_MIN_DIGITS))
+    if not country_code:
+        valid &= ~(trunk | national)
+    normalized = ("+" + full).where(valid)
+    return normalized, ~blank & ~valid
+
+
+class PhoneNormalizer:
+    # Applies normalize_phone_numbers to DataFrames and contact streams and keeps a
+    # per-source count of rejected numbers, like PhoneIndex does for duplicates
+    def __init__(self, country_code=DEFAULT_COUNTRY_CODE):
+        self.country_code = country_code
+        self.rejected = {}  # Source file -> invalid phone numbers dropped
+
+    def normalize(self, phones, source):
+        normalized, rejected = normalize_phone_numbers(phones, self.country_code)
+        self.rejected[source] = self.rejected.get(source, 0) + int(rejected.sum())
+        return normalized, rejected
+
+    def filter_frame(self, df, source):
+        # Every phone column is normalized in one call over the values flattened row by
+        # row. As in filter_contacts, invalid numbers are blanked and a row is dropped
+        # only when all of its non-blank numbers are invalid.
+        columns = [df.columns[i] for i in find_phone_columns(df.columns)]
+        flat = pd.Series(df[columns].to_numpy(dtype=object).ravel(), dtype=object)
+        normalized, rejected = self.normalize(flat, source)
+        normalized = normalized.to_numpy(dtype=object).reshape(len(df), len(columns))
+        rejected = rejected.to_numpy().reshape(len(df), len(columns))
+        keep = pd.notna(normalized).any(axis=1) | ~rejected.any(axis=1)
+        df = df[keep].copy()
+        for i, column in enumerate(columns):
+            df[column] = normalized[keep, i]
+        return df
+
+    def filter_contacts(self, contacts, source, metrics=NO_METRICS):
+        # Normalizes NORMALIZE_BATCH_SIZE contacts at a time; invalid numbers are removed
+        # and contacts left with no valid number are dropped
+        self.rejected.setdefault(source, 0)
+        contacts = iter(contacts)
+        while True:
+            batch = list(itertools.islice(contacts, NORMALIZE_BATCH_SIZE))
+            if not batch:
+                return
+            with metrics.stage("transform"):
+                flat = [phone for _, phone_numbers in batch for phone in phone_numbers]
+                normalized, _ = self.normalize(pd.Series(flat, dtype=object), source)
+                values = normalized.tolist()
+                position = 0
+                kept_contacts = []
+                for name, phone_numbers in batch:
+                    kept = [value for value in values[position:position + len(phone_numbers)] if isinstance(value, str)]
+                    position += len(phone_numbers)
+                    if kept or not phone_numbers:
+                        kept_contacts.append((name, kept))
+            yield from kept_contacts
+
+    def summary(self):
+        total = sum(self.rejected.values())
+        lines = [f"{os.path.basename(str(source))}: {count:,}" for source, count in self.rejected.items()]
+        return f"Invalid phone numbers rejected: {total:,}\n" + "\n".join(lines)
+
+
+# Phone number deduplication. Numbers are keyed on the E.164 digits normalization would
+# give them, whether or not it is turned on, so "0712 345 678", "+254712345678" and
+# "00254712345678" collide (with country code 254). Keys of up to 17 digits are stored as
+# exact integers (with a leading 1 so leading zeros survive), which is far smaller than a
+# set of strings.
+NON_DIGIT_PATTERN = re.compile(r'\D')
+PHONE_COLUMN_PATTERN = re.compile(r'phone|tel|mobile|number', re.I)
+
+
+def e164_key(text, digits, country_code):
+    # The rules of normalize_phone_numbers without its validity checks; country_code is digits only
+    if not digits:
+        return None
+    if not text.startswith("+"):
+        if digits.startswith("00"):
+            digits = digits[2:]
+        elif country_code and digits.startswith("0"):
+            digits = country_code + digits[1:]
+        elif country_code and len(digits) <= NATIONAL_NUMBER_MAX_DIGITS:
+            digits = country_code + digits
+    if not digits:
+        return None
+    return int("1" + digits) if len(digits) <= 17 else digits
+
+
+def phone_key(phone, country_code=DEFAULT_COUNTRY_CODE):
+    if isinstance(phone, float) and phone.is_integer():  # pandas reads numeric columns as float when values are missing
+        phone = int(phone)
+    text = str(phone).strip()
+    return e164_key(text, NON_DIGIT_PATTERN.sub("", text), NON_DIGIT_PATTERN.sub("", country_code or ""))
+
+
+def phone_key_list(phones, country_code=DEFAULT_COUNTRY_CODE):
+    # phone_key for a whole column, with the digits extracted in one vectorized pass
+    text = phone_text(phones)
+    digits = text.str.replace(r'\D', '', regex=True).tolist()
+    country_code = NON_DIGIT_PATTERN.sub("", country_code or "")
+    return [e164_key(value, value_digits, country_code) for value, value_digits in zip(text.tolist(), digits)]
+
+
+def find_phone_column(columns):
+    # Position of the first phone-like column, else the second column as in the converter
+    for i, column in enumerate(columns):
+        if PHONE_COLUMN_PATTERN.search(str(column)):
+            return i
+    return 1 if len(columns) > 1 else 0
+
+
+def find_phone_columns(columns):
+    # Positions of every phone-like column after the name, else the one find_phone_column picks
+    positions = [i for i, column in enumerate(columns) if i > 0 and PHONE_COLUMN_PATTERN.search(str(column))]
+    return positions or [find_phone_column(columns)]
+
+
+class PhoneIndex:
+    # One-pass duplicate filter with O(1) lookups. Keys live in a set until
+    # memory_keys is reached; after that new keys go to a temporary SQLite table so
+    # sets larger than RAM still work. Rows without any digits are never dropped.
+    # country_code is the one added to national numbers when keying them.
+    def __init__(self, country_code=DEFAULT_COUNTRY_CODE, memory_keys=PHONE_INDEX_MEMORY_KEYS):
+        self.country_code = country_code
+        self.memory_keys = memory_keys
+        self.seen = set()
+        self.db = None
+        self.db_path = None
+        self.duplicates = {}  # Source file -> duplicate phone numbers dropped
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        if self.db is not None:
+            self.db.close()
+            self.db = None
+            remove_partial_output(self.db_path)
+
+    def spill(self):
+        fd, self.db_path = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        self.db = sqlite3.connect(self.db_path, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=OFF")
+        self.db.execute("PRAGMA synchronous=OFF")
+        self.db.execute("CREATE TABLE seen (key PRIMARY KEY) WITHOUT ROWID")
+        self.db.execute("BEGIN")  # Never committed; the file is thrown away on close
+
+    def add(self, key):
+        # True if the key had not been seen before
+        if key is None:
+            return True
+        if key in self.seen:
+            return False
+        if self.db is None:
+            if len(self.seen) < self.memory_keys:
+                self.seen.add(key)
+                return True
+            self.spill()
+        return self.db.execute("INSERT OR IGNORE INTO seen VALUES (?)", (key,)).rowcount == 1
+
+    def count_duplicates(self, source, count):
+        self.duplicates[source] = self.duplicates.get(source, 0) + count
+
+    def filter_contacts(self, contacts, source, metrics=NO_METRICS):
+        # Drop numbers already seen; contacts left with no number are dropped entirely
+        self.count_duplicates(source, 0)
+        contacts = iter(contacts)
+        while True:
+            batch = list(itertools.islice(contacts, PIPELINE_BATCH_ROWS))
+            if not batch:
+                return
+            with metrics.stage("transform"):
+                kept_contacts = []
+                for name, phone_numbers in batch:
+                    kept = [phone for phone in phone_numbers if self.add(phone_key(phone, self.country_code))]
+                    if len(kept) < len(phone_numbers):
+                        self.count_duplicates(source, len(phone_numbers) - len(kept))
+                    if kept or not phone_numbers:
+                        kept_contacts.append((name, kept))
+            yield from kept_contacts
+
+    def check_keys(self, keys):
+        # One row's phone_key values -> (duplicate flag per value, whether to keep the row).
+        # As in filter_contacts, a row is dropped only when every number in it was seen
+        # before; rows with no number at all are kept.
+        duplicates = []
+        has_number = keeps_number = False
+        for key in keys:
+            duplicate = key is not None and not self.add(key)
+            duplicates.append(duplicate)
+            has_number = has_number or key is not None
+            keeps_number = keeps_number or (key is not None and not duplicate)
+        return duplicates, keeps_number or not has_number
+
+    def filter_frame(self, df, source):
+        # Checks every phone column; duplicate numbers are blanked in rows that are kept
+        # (check_keys over the keys flattened row by row, without a call per row)
+        columns = [df.columns[i] for i in find_phone_columns(df.columns)]
+        keys = [key for row in zip(*(phone_key_list(df[column], self.country_code) for column in columns)) for key in row]
+        present = np.array([key is not None for key in keys], dtype=bool).reshape(len(df), len(columns))
+        duplicates = np.array([key is not None and not self.add(key) for key in keys], dtype=bool).reshape(len(df), len(columns))
+        keep = ~present.any(axis=1) | (present & ~duplicates).any(axis=1)
+        self.count_duplicates(source, int(duplicates.sum()))
+        df = df[keep]
+        duplicates = duplicates[keep]
+        if duplicates.any():
+            df = df.copy()
+            for i, column in enumerate(columns):
+                if duplicates[:, i].any():
+                    df[column] = df[column].where(~duplicates[:, i])
+        return df
+
+    def summary(self):
+        total = sum(self.duplicates.values())
+        lines = [f"{os.path.basename(str(source))}: {count:,}" for source, count in self.duplicates.items()]
+        return f"Duplicate phone numbers dropped: {total:,}\n" + "\n".join(lines)
+
+
+# Progress over several files, in KB of input: the readers of one file report how far
+# they are through it, and the files finished before it are added on. A cancel raised
+# by progress inside a file would otherwise be recorded as that file's error by the
+# per-file error handling, so finish() raises it again for the batch.
+def file_size(file_path):
+    try:
+        return os.path.getsize(file_path)
+    except OSError:
+        return 0
+
+
+class BatchProgress:
+    def __init__(self, progress, file_paths):
+        self.progress = progress
+        self.total = sum(file_size(p) for p in file_paths) // 1024
+        self.done = 0  # Bytes of the files finished
+        self.stopped = None
+
+    def file(self, file_path):
+        # progress(done, total, unit) for one file's readers, or None when not reporting
+        if self.progress is None:
+            return None
+
+        def report(done, total, unit):
+            try:
+                self.progress(self.done // 1024 + done, self.total, "KB")
+            except BaseException as e:
+                self.stopped = e
+                raise
+        return report
+
+    def finish(self, file_path):
+        if self.stopped is not None:
+            raise self.stopped
+        self.done += file_size(file_path)
+        if self.progress:
+            self.progress(self.done // 1024, self.total, "KB")
+
+
+# Batch conversion. Mode names match the converter tab's radio buttons.
+CONVERTERS = {
+    "csv2vcf": (stream_csv_to_vcf, '.vcf'),
+    "vcf2csv": (stream_vcf_to_csv, '.csv'),
+}
+
+
+def conversion_output_path(file_path, output_dir, mode, shard_limits=None):
+    # Sharded conversions report their index file, which lists the shards
+    output_path = Path(output_dir) / Path(file_path).with_suffix(CONVERTERS[mode][1]).name
+    if shard_limits is not None and mode == "csv2vcf":
+        return shard_index_path(output_path)
+    return output_path
+
+
+def convert_file_group(file_paths, output_dir, mode, dedup_index=None, normalizer=None, metrics=NO_METRICS, shard_limits=None,
+                       batch_progress=None):
+    # Runs in a worker process. Files sharing an output name are converted in input
+    # order within one group, so the last one wins exactly as in a sequential run.
+    # The normalizer's rejection counts and the group's metrics are returned since a
+    # worker's copies are discarded. batch_progress (a BatchProgress) is only passed
+    # when the group runs in the calling process.
+    convert = CONVERTERS[mode][0]
+    group_metrics = metrics.child()
+    results = []
+    for file_path in file_paths:
+        output_path = conversion_output_path(file_path, output_dir, mode)
+        progress = batch_progress.file(file_path) if batch_progress else None
+        try:
+            if shard_limits is not None and mode == "csv2vcf":
+                stream_csv_to_vcf_shards(file_path, output_path, shard_limits, dedup_index, normalizer, group_metrics, progress)
+                output_path = shard_index_path(output_path)
+            else:
+                convert(file_path, output_path, dedup_index, normalizer, group_metrics, progress)
+            results.append((file_path, output_path, None))
+        except Exception as e:
+            results.append((file_path, None, str(e)))
+        if batch_progress:
+            batch_progress.finish(file_path)
+    return results, (normalizer.rejected if normalizer is not None else {}), group_metrics
+
+
+def convert_files_parallel(file_paths, output_dir, mode, max_workers=DEFAULT_CONVERSION_WORKERS, progress=None, dedup_index=None, normalizer=None, metrics=NO_METRICS, shard_limits=None):
+    # Returns (file_path, output_path, error) for every input, in input order.
+    # One bad file only records its error; the rest of the batch still runs.
+    # progress(done, total, "KB") may raise to stop the batch. Files converted in this
+    # process report as they are read; those in worker processes only when they finish.
+    batch_progress = BatchProgress(progress, file_paths)
+    if dedup_index is not None:
+        # The first occurrence of a number must win across the whole batch, so a shared
+        # index means converting one file at a time in input order
+        results = []
+        for file_path in file_paths:
+            file_results, _, file_metrics = convert_file_group([file_path], output_dir, mode, dedup_index, normalizer, metrics,
+                                                               shard_limits, batch_progress)
+            results.extend(file_results)
+            metrics.merge(file_metrics)
+        return results
+
+    groups = {}
+    for file_path in file_paths:
+        groups.setdefault(conversion_output_path(file_path, output_dir, mode), []).append(file_path)
+
+    group_results = {}
+    if max_workers <= 1 or len(groups) <= 1:
+        for key, group in groups.items():
+            group_results[key], _, group_metrics = convert_file_group(group, output_dir, mode, None, normalizer, metrics,
+                                                                      shard_limits, batch_progress)
+            metrics.merge(group_metrics)
+    else:
+        executor = ProcessPoolExecutor(max_workers=min(max_workers, len(groups)))
+        try:
+            futures = {executor.submit(convert_file_group, group, output_dir, mode, None, normalizer, metrics, shard_limits): key for key, group in groups.items()}
+            for future in as_completed(futures):
+                key = futures[future]
+                try:
+                    group_results[key], rejected, group_metrics = future.result()
+                    metrics.merge(group_metrics)
+                    if normalizer is not None:
+                        normalizer.rejected.update(rejected)
+                except Exception as e:  # e.g. a worker process died
+                    group_results[key] = [(file_path, None, str(e)) for file_path in groups[key]]
+                for file_path in groups[key]:
+                    batch_progress.finish(file_path)
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    by_input = {}
+    for key in groups:
+        for result in group_results[key]:
+            by_input.setdefault(result[0], []).append(result)
+    return [by_input[file_path].pop(0) for file_path in file_paths]
+
+
+# Incremental conversion. A manifest in the output directory records, per input, its
+# size, mtime, content hash, the options used and the output written. A file is only
+# hashed again when its size or mtime changed, and only reconverted when its content,
+# the options or its output differ from the manifest. A sharded output is its index and
+# every shard the index lists, and each of them must still have the recorded size.
+def file_content_hash(file_path):
+    digest = hashlib.sha256()
+    with open(file_path, mode='rb') as file:
+        while chunk := file.read(HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(file_path, entry=None):
+    # Reuses the hash in a manifest entry while size and mtime are unchanged
+    stat = os.stat(file_path)
+    if entry and entry.get("size") == stat.st_size and entry.get("mtime_ns") == stat.st_mtime_ns:
+        content_hash = entry["sha256"]
+    else:
+        content_hash = file_content_hash(file_path)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": content_hash}
+
+
+def output_file_sizes(output_path, options):
+    # File name -> size of everything a conversion wrote
+    paths = [Path(output_path)]
+    if options.get("shards") is not None:
+        paths += [Path(output_path).with_name(name) for name in read_shard_index(output_path)]
+    return {path.name: os.path.getsize(path) for path in paths}
+
+
+def manifest_entry_is_current(entry, fingerprint, output_path, options):
+    if entry is None or entry["sha256"] != fingerprint["sha256"] or entry["options"] != options:
+        return False
+    if entry["output"] != str(output_path):
+        return False
+    try:
+        return output_file_sizes(output_path, options) == entry.get("output_sizes")
+    except OSError:
+        return False
+
+
+class ConversionManifest:
+    def __init__(self, output_dir):
+        self.path = Path(output_dir) / CONVERSION_MANIFEST_NAME
+        self.entries = {}  # Absolute input path -> fingerprint, options and output
+        try:
+            with open(self.path) as file:
+                self.entries = json.load(file).get("files", {})
+        except (OSError, ValueError, AttributeError):
+            pass  # Missing or unreadable: everything is converted and a new manifest written
+
+    def fingerprint(self, file_path):
+        return file_fingerprint(file_path, self.entries.get(os.path.abspath(file_path)))
+
+    def is_current(self, file_path, fingerprint, output_path, options):
+        return manifest_entry_is_current(self.entries.get(os.path.abspath(file_path)), fingerprint, output_path, options)
+
+    def record(self, file_path, fingerprint, output_path, options):
+        self.entries[os.path.abspath(file_path)] = dict(
+            fingerprint, options=options, output=str(output_path), output_sizes=output_file_sizes(output_path, options))
+
+    def forget(self, file_path):
+        self.entries.pop(os.path.abspath(file_path), None)
+
+    def save(self):
+        # Written to a temporary file and renamed, so an interrupted save keeps the old manifest
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, mode='w') as file:
+                json.dump({"version": CONVERSION_FORMAT_VERSION, "files": self.entries}, file, indent=1)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            remove_partial_output(temp_path)
+            raise
+
+
+def conversion_options(mode, dedup_index=None, normalizer=None, shard_limits=None):
+    return {
+        "mode": mode,
+        "format": CONVERSION_FORMAT_VERSION,
+        "dedup": dedup_index is not None,
+        "dedup_country_code": dedup_index.country_code if dedup_index is not None else None,
+        "country_code": normalizer.country_code if normalizer is not None else None,
+        "shards": shard_limits.options() if shard_limits is not None and mode == "csv2vcf" else None,
+    }
+
+
+def convert_files_incremental(file_paths, output_dir, mode, max_workers=DEFAULT_CONVERSION_WORKERS, progress=None, dedup_index=None, normalizer=None, metrics=NO_METRICS, force=False, shard_limits=None):
+    # Returns (results, skipped): results as from convert_files_parallel for every input,
+    # skipped the inputs left alone because their output is up to date. force converts
+    # everything but still writes the manifest for the next run.
+    manifest = ConversionManifest(output_dir)
+    options = conversion_options(mode, dedup_index, normalizer, shard_limits)
+    fingerprints = {}
+    stale_outputs = set()
+    with metrics.stage("read"):
+        for i, file_path in enumerate(file_paths):
+            output_path = conversion_output_path(file_path, output_dir, mode, shard_limits)
+            try:
+                fingerprints[file_path] = manifest.fingerprint(file_path)
+            except OSError:
+                stale_outputs.add(output_path)  # Let the conversion report the error
+                continue
+            if force or not manifest.is_current(file_path, fingerprints[file_path], output_path, options):
+                stale_outputs.add(output_path)
+            if progress:
+                progress(i + 1, len(file_paths), "files checked")
+
+    # Files sharing an output name are converted together so the last one still wins.
+    # With deduplication each output depends on every file before it, so any change
+    # means converting the whole batch again.
+    if dedup_index is not None and stale_outputs:
+        to_convert = list(file_paths)
+    else:
+        to_convert = [p for p in file_paths if conversion_output_path(p, output_dir, mode, shard_limits) in stale_outputs]
+    converted = {}
+    if to_convert:
+        for result in convert_files_parallel(to_convert, output_dir, mode, max_workers, progress, dedup_index, normalizer, metrics, shard_limits):
+            converted[result[0]] = result
+
+    results = []
+    skipped = []
+    for file_path in file_paths:
+        if file_path in converted:
+            _, output_path, error = converted[file_path]
+            if error is None and file_path in fingerprints:
+                manifest.record(file_path, fingerprints[file_path], output_path, options)
+            else:
+                manifest.forget(file_path)
+            results.append(converted[file_path])
+        else:
+            # Refresh size and mtime so a touched but unchanged file is not hashed again
+            manifest.entries[os.path.abspath(file_path)].update(fingerprints[file_path])
+            skipped.append(file_path)
+            results.append((file_path, conversion_output_path(file_path, output_dir, mode, shard_limits), None))
+    manifest.save()
+    return results, skipped
+
+
+# Hot-folder watching. New or changed CSV/VCF files in a folder are converted into
+# the output directory as they arrive, by extension. Changes come from watchfiles'
+# native notifications when it is installed, else from polling the folder. A file is
+# converted once its size and mtime have held still for settle_seconds and it can be
+# opened, so files still being copied in are left alone. Ready files go to a process
+# pool, which also hashes them, and the manifest of the incremental mode records
+# each result, so restarts and touched-but-unchanged files do not convert again.
+def convert_watched_file(file_path, output_dir, mode, entry, options, normalizer=None, shard_limits=None, metrics=NO_METRICS):
+    # Runs in a worker process. Returns (fingerprint, result, rejected, metrics); result
+    # is None when the manifest entry shows this content was converted already.
+    fingerprint = file_fingerprint(file_path, entry)
+    output_path = conversion_output_path(file_path, output_dir, mode, shard_limits)
+    if manifest_entry_is_current(entry, fingerprint, output_path, options):
+        return fingerprint, None, {}, metrics.child()
+    results, rejected, group_metrics = convert_file_group([file_path], output_dir, mode, None, normalizer, metrics, shard_limits)
+    return fingerprint, results[0], rejected, group_metrics
+
+
+def ignore_interrupts():
+    # Worker initializer: Ctrl+C stops the watcher in the main process, which then shuts the pool down
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def is_file_readable(file_path):
+    # On Windows a file another program is still writing usually cannot be opened
+    try:
+        with open(file_path, mode='rb'):
+            return True
+    except OSError:
+        return False
+
+
+class FolderWatcher:
+    def __init__(self, input_dir, output_dir, max_workers=DEFAULT_CONVERSION_WORKERS, normalizer=None, shard_limits=None,
+                 settle_seconds=WATCH_SETTLE_SECONDS, poll_interval=WATCH_POLL_INTERVAL, native=True):
+        if Path(input_dir).resolve() == Path(output_dir).resolve():
+            raise ValueError("The output directory must not be the watched folder, or converted files would be converted back.")
+        self.input_dir = os.path.abspath(input_dir)
+        self.output_dir = output_dir
+        self.max_workers = max_workers
+        self.normalizer = normalizer
+        self.shard_limits = shard_limits
+        self.settle_seconds = settle_seconds
+        self.poll_interval = poll_interval
+        self.native = native  # Use watchfiles if installed
+        self.using_native = False
+        self.manifest = ConversionManifest(output_dir)
+        self.options = {mode: conversion_options(mode, None, normalizer, shard_limits) for mode in WATCH_MODES.values()}
+        self.pending = {}  # Path -> (size, mtime_ns, monotonic time it last changed)
+        self.running = {}  # Future -> (path, output path)
+        self.converted = 0
+        self.unchanged = 0
+        self.failed = 0
+
+    def watched_mode(self, file_path):
+        name = os.path.basename(file_path)
+        if name.startswith("."):
+            return None
+        return WATCH_MODES.get(os.path.splitext(name)[1].lower())
+
+    def scan(self):
+        # Path -> (size, mtime_ns) of every watched file in the folder
+        files = {}
+        with os.scandir(self.input_dir) as entries:
+            for entry in entries:
+                if self.watched_mode(entry.name) and entry.is_file():
+                    stat = entry.stat()
+                    files[os.path.join(self.input_dir, entry.name)] = (stat.st_size, stat.st_mtime_ns)
+        return files
+
+    def changes(self):
+        # Yields the set of paths that changed, at least every poll_interval
+        watch = None
+        if self.native:
+            try:
+                watch = importlib.import_module("watchfiles").watch
+            except ImportError:
+                pass
+        if watch is not None:
+            self.using_native = True
+            for changes in watch(self.input_dir, recursive=False, yield_on_timeout=True,
+                                 rust_timeout=int(self.poll_interval * 1000)):
+                yield {os.path.abspath(path) for _, path in changes}
+        else:
+            previous = {}
+            while True:
+                current = self.scan()
+                yield {path for path, state in current.items() if previous.get(path) != state}
+                previous = current
+                time.sleep(self.poll_interval)
+
+    def note(self, paths):
+        # Changed files (re)start their settle time; deleted ones are dropped
+        now = time.monotonic()
+        for path in paths:
+            if self.watched_mode(path) is None:
+                continue
+            try:
+                stat = os.stat(path)
+            except OSError:
+                self.pending.pop(path, None)
+                continue
+            state = (stat.st_size, stat.st_mtime_ns)
+            if self.pending.get(path, (None, None))[:2] != state:
+                self.pending[path] = (*state, now)
+
+    def submit_ready(self, executor, metrics, on_result=None):
+        # Only the pending files are looked at again, never the whole folder
+        self.note(list(self.pending))
+        now = time.monotonic()
+        busy = {output_path for _, output_path in self.running.values()}
+        for path, (size, mtime_ns, changed_at) in list(self.pending.items()):
+            if path not in self.pending or now - changed_at < self.settle_seconds or not is_file_readable(path):
+                continue
+            mode = self.watched_mode(path)
+            output_path = conversion_output_path(path, self.output_dir, mode, self.shard_limits)
+            if output_path in busy:
+                continue  # Another file with the same output name is converting; the last one still wins
+            del self.pending[path]
+            entry = self.manifest.entries.get(path)
+            if entry and (entry["size"], entry["mtime_ns"]) == (size, mtime_ns) and \
+                    manifest_entry_is_current(entry, entry, output_path, self.options[mode]):
+                self.unchanged += 1
+                if on_result:
+                    on_result(path, output_path, None, True)
+                continue
+            future = executor.submit(convert_watched_file, path, self.output_dir, mode, entry, self.options[mode],
+                                     self.normalizer, self.shard_limits, metrics)
+            self.running[future] = (path, output_path)
+            busy.add(output_path)
+
+    def collect(self, metrics, on_result=None):
+        finished = [future for future in self.running if future.done()]
+        for future in finished:
+            path, output_path = self.running.pop(future)
+            if future.cancelled():
+                continue  # Stopped before it started; not in the manifest, so the next run converts it
+            mode = self.watched_mode(path)
+            try:
+                fingerprint, result, rejected, file_metrics = future.result()
+                metrics.merge(file_metrics)
+                if self.normalizer is not None:
+                    self.normalizer.rejected.update(rejected)
+            except Exception as e:  # e.g. a worker process died
+                fingerprint, result = None, (path, None, str(e))
+            if result is None:
+                self.manifest.entries[path].update(fingerprint)
+                self.unchanged += 1
+                error = None
+            else:
+                _, _, error = result
+                if error is None:
+                    self.manifest.record(path, fingerprint, output_path, self.options[mode])
+                    self.converted += 1
+                else:
+                    self.manifest.forget(path)
+                    self.failed += 1
+            if on_result:
+                on_result(path, output_path, error, result is None)
+        if finished:
+            self.manifest.save()
+
+    def status(self):
+        return (f"files converted ({self.failed:,} failed, {self.unchanged:,} unchanged, "
+                f"{len(self.pending) + len(self.running):,} waiting)")
+
+    def run(self, progress=None, on_result=None, metrics=NO_METRICS):
+        # Watches until progress raises (the GUI's cancel) or the process is interrupted.
+        # on_result(path, output_path, error, unchanged) is called as each file is done.
+        os.makedirs(self.output_dir, exist_ok=True)
+        executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=ignore_interrupts)
+        try:
+            self.note(self.scan())  # Files already in the folder
+            for changed in self.changes():
+                self.note(changed)
+                self.submit_ready(executor, metrics, on_result)
+                self.collect(metrics, on_result)
+                if progress:
+                    progress(self.converted, None, self.status())
+        finally:
+            executor.shutdown(cancel_futures=True)
+            self.collect(metrics, on_result)
+            self.manifest.save()
+
+
+# Contact names are "<prefix> <zero-padded number>". The padding is at least 3 digits,
+# the historical format, and widens to fit the last number so names keep sorting in
+# numeric order past 999.
+def contact_name_width(start_index, count):
+    return max(3, len(str(abs(start_index + count - 1))))
+
+
+def make_contact_names(prefix, start_index, count, width=None):
+    if width is None:
+        width = contact_name_width(start_index, count)
+    numbers = np.arange(start_index, start_index + count).astype(str)
+    return np.char.add(f"{prefix} ", np.char.zfill(numbers, width))
+
+
+def rename_frames(frames, prefix, start_index, metrics=NO_METRICS):
+    # One vectorized pass over all frames, then slice per frame. The first column
+    # holds the names; frames are changed in place.
+    with metrics.stage("transform"):
+        name_column = frames[0].columns[0]
+        new_names = make_contact_names(prefix, start_index, sum(len(df) for df in frames))
+        current_index = 0
+        for df in frames:
+            df_length = len(df)
+            df[name_column] = new_names[current_index:current_index + df_length]
+            current_index += df_length
+    return frames
+
+
+def make_contacts_frame(lines, name_prefix, start_index, country_code=None, metrics=NO_METRICS):
+    # Blank lines are skipped; the index keeps 1-based line numbers for the rejected lines
+    with metrics.stage("parse"):
+        phones = pd.Series(lines, index=range(1, len(lines) + 1), dtype=object).str.strip()
+        phones = phones[phones != ""]
+    with metrics.stage("transform"):
+        rejected_lines = phones.iloc[:0]
+        if country_code is not None:
+            normalized, rejected = normalize_phone_numbers(phones, country_code)
+            rejected_lines = phones[rejected]
+            phones = normalized[~rejected]
+
+        names = make_contact_names(name_prefix, start_index, len(phones))
+        df = pd.DataFrame({"name": names, "phone": phones.to_numpy()})
+    return df, rejected_lines
+
+
+# Bulk CSV Maker: phone numbers are read from files and turned into named contacts
+# MAKE_CHUNK_ROWS at a time, so a million-number list never sits in a text widget or
+# a DataFrame. The name padding depends on how many numbers survive normalizing, so
+# the kept numbers are first spooled to a temporary file and named on a second pass;
+# the output matches what make_contacts_frame gives for the same numbers pasted in.
+def looks_like_phone(text):
+    text = text.strip()
+    return bool(re.match(PHONE_ALLOWED_PATTERN, text)) and any(c.isdigit() for c in text)
+
+
+def csv_phone_column(first_row):
+    # (column, has_header). A first row with a phone number in it is data, not a header
+    for i, cell in enumerate(first_row):
+        if looks_like_phone(cell):
+            return i, False
+    return find_phone_column(first_row), True
+
+
+def iter_phone_lines(file_path):
+    # Stripped, non-blank numbers: one per line in text files, the phone column of CSV files
+    with open(file_path, mode='r', newline='', encoding='utf-8-sig') as file:
+        if Path(file_path).suffix.lower() != ".csv":
+            for line in file:
+                line = line.strip()
+                if line:
+                    yield line
+            return
+        reader = csv.reader(file)
+        first_row = next(reader, None)
+        if first_row is None:
+            return
+        column, has_header = csv_phone_column(first_row)
+        for row in reader if has_header else itertools.chain([first_row], reader):
+            if column < len(row) and row[column].strip():
+                yield row[column].strip()
+
+
+def count_phone_lines(file_paths):
+    # The progress total for reading the numbers: exactly what iter_phone_lines yields
+    return sum(sum(1 for _ in iter_phone_lines(file_path)) for file_path in file_paths)
+
+
+def spool_phone_numbers(file_paths, spool_path, normalizer=None, progress=None, metrics=NO_METRICS):
+    # First pass: the numbers kept after normalizing, pickled a chunk at a time (much
+    # cheaper than a CSV round trip, and any text comes back as it went in). Returns how many
+    total = count_phone_lines(file_paths)
+    done = 0
+    kept = 0
+    with open(spool_path, mode='wb') as spool:
+        for file_path in file_paths:
+            if normalizer is not None:
+                normalizer.rejected.setdefault(file_path, 0)
+            phones = iter_phone_lines(file_path)
+            while True:
+                with metrics.stage("parse"):
+                    batch = list(itertools.islice(phones, MAKE_CHUNK_ROWS))
+                if not batch:
+                    break
+                metrics.add(rows_read=len(batch))
+                done += len(batch)
+                if normalizer is not None:
+                    with metrics.stage("transform"):
+                        normalized, rejected = normalizer.normalize(pd.Series(batch, dtype=object), file_path)
+                        batch = normalized[~rejected].tolist()
+                with metrics.stage("write"):
+                    pickle.dump(batch, spool, pickle.HIGHEST_PROTOCOL)
+                kept += len(batch)
+                if progress:
+                    progress(done, total, "numbers read")
+            metrics.add(bytes_read=os.path.getsize(file_path))
+    return kept
+
+
+def iter_made_contacts(spool_path, count, name_prefix, start_index, progress=None, metrics=NO_METRICS):
+    # Second pass: lists of (name, phone), padded to the width the kept count needs
+    width = contact_name_width(start_index, count)
+    index = start_index
+    with open(spool_path, mode='rb') as spool:
+        while True:
+            with metrics.stage("parse"):
+                try:
+                    batch = pickle.load(spool)
+                except EOFError:
+                    return
+            with metrics.stage("transform"):
+                names = make_contact_names(name_prefix, index, len(batch), width).tolist()
+            index += len(batch)
+            yield list(zip(names, batch))
+            if progress:
+                progress(index - start_index, count, "contacts written")
+
+
+def stream_make_contacts(file_paths, output_path, name_prefix, start_index, normalizer=None, progress=None, metrics=NO_METRICS):
+    # Writes a VCF when output_path ends in .vcf, else a CSV. Returns the contacts written.
+    # The spool sits next to the output, which is about its size.
+    fd, spool_path = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(os.path.abspath(output_path)))
+    os.close(fd)
+    try:
+        count = spool_phone_numbers(file_paths, spool_path, normalizer, progress, metrics)
+        chunks = iter_made_contacts(spool_path, count, name_prefix, start_index, progress, metrics)
+        if Path(output_path).suffix.lower() == ".vcf":
+            contacts = ((name, [phone]) for chunk in chunks for name, phone in chunk)
+            write_vcards(contacts, output_path, metrics)
+            metrics.add(bytes_written=os.path.getsize(output_path))
+            return count
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer, lineterminator=os.linesep)
+        try:
+            with open(output_path, mode='w', newline='', encoding='utf-8') as output:
+                writer.writerow(["name", "phone"])
+                for chunk in chunks:
+                    with metrics.stage("render"):
+                        writer.writerows(chunk)
+                    with metrics.stage("write"):
+                        output.write(buffer.getvalue())
+                    buffer.seek(0)
+                    buffer.truncate()
+                # The header alone when the files held no numbers
+                output.write(buffer.getvalue())
+        except BaseException:
+            remove_partial_output(output_path)
+            raise
+        metrics.add(rows=count, bytes_written=os.path.getsize(output_path))
+        return count
+    finally:
+        remove_partial_output(spool_path)
+
+
+# Search over the editor's frames. Rows are numbered globally across the frames, in
+# order. Each searchable text (lowercased names; phone numbers as E.164 digits, or
+# their raw digits when they do not normalize) is joined into one newline-separated
+# string, so a substring query is a single C-level scan instead of a Python loop over
+# every row, and a prefix query is the same scan anchored after a newline. Names are
+# also kept sorted, for prefix lookups by bisection.
+class TextSearchIndex:
+    def __init__(self, keys, rows, sort=False):
+        # keys: list of str, rows: the global row of each key (a row may have several)
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.text = "\n" + "\n".join(keys) + "\n"
+        self.starts = np.cumsum([1] + [len(key) + 1 for key in keys[:-1]]) if keys else np.zeros(0, dtype=np.int64)
+        self.sorted_keys = None
+        if sort:
+            if pd.Index(keys).is_monotonic_increasing:
+                self.sorted_keys, self.sorted_rows = keys, self.rows
+            else:
+                order = sorted(range(len(keys)), key=keys.__getitem__)
+                self.sorted_keys = [keys[i] for i in order]
+                self.sorted_rows = self.rows[order]
+
+    def prefix(self, query):
+        if self.sorted_keys is None:
+            return self.substring("\n" + query)
+        lo = bisect.bisect_left(self.sorted_keys, query)
+        hi = bisect.bisect_left(self.sorted_keys, query + "\U0010ffff", lo)
+        return self.sorted_rows[lo:hi]
+
+    def substring(self, query):
+        # A match starting on a separator belongs to the key after it. A key matching
+        # several times (an in Anna Banana) counts once.
+        positions = [match.start() for match in re.finditer(re.escape(query), self.text)]
+        keys = np.unique(np.searchsorted(self.starts, np.add(positions, 1), side="right") - 1)
+        return self.rows[keys]
+
+
+class ContactSearchIndex:
+    def __init__(self, frames, country_code=DEFAULT_COUNTRY_CODE, metrics=NO_METRICS):
+        self.country_code = country_code
+        with metrics.stage("transform"):
+            self.row_starts = np.cumsum([0] + [len(df) for df in frames[:-1]]) if frames else np.zeros(0, dtype=np.int64)
+            self.names = self.build_names(frames)
+            self.phones = self.build_phones(frames)
+
+    def build_names(self, frames):
+        names = pd.concat([df.iloc[:, 0] for df in frames], ignore_index=True) if frames else pd.Series([], dtype=object)
+        keys = names.astype(str).where(names.notna(), "").str.lower().tolist()
+        return TextSearchIndex(keys, np.arange(len(keys)), sort=True)
+
+    def build_phones(self, frames):
+        keys = []
+        rows = []
+        for df, start in zip(frames, self.row_starts):
+            for column in [df.columns[i] for i in find_phone_columns(df.columns)]:
+                digits = self.phone_keys(df[column])
+                present = digits.ne("").to_numpy()
+                keys.extend(digits[present].tolist())
+                rows.append(np.flatnonzero(present) + start)
+        return TextSearchIndex(keys, np.concatenate(rows) if rows else [])
+
+    def phone_keys(self, phones):
+        # E.164 digits without the "+", so 0712 345678 and +254712345678 find each other
+        phones = phones.reset_index(drop=True)
+        normalized, rejected = normalize_phone_numbers(phones, self.country_code)
+        keys = normalized.str[1:].fillna("").astype(object)
+        if rejected.any():
+            keys[rejected] = phone_text(phones[rejected]).str.replace(r'\D', '', regex=True)
+        return keys
+
+    def update_names(self, frames, metrics=NO_METRICS):
+        # After renaming only the names change, and generated names are already in
+        # sorted order, so the sort is skipped
+        with metrics.stage("transform"):
+            self.names = self.build_names(frames)
+
+    def query_phone_digits(self, query):
+        digits = NON_DIGIT_PATTERN.sub("", query)
+        normalized, _ = normalize_phone_numbers(pd.Series([query], dtype=object), self.country_code)
+        if isinstance(normalized.iloc[0], str):
+            return normalized.iloc[0][1:]
+        if digits.startswith("00"):
+            return digits[2:]
+        if digits.startswith("0") and not query.lstrip().startswith("+"):
+            return NON_DIGIT_PATTERN.sub("", self.country_code or "") + digits[1:]
+        return digits
+
+    def search(self, query, prefix=False):
+        # Sorted global row numbers of the matches. Queries made of phone characters with
+        # at least PHONE_QUERY_MIN_DIGITS digits also search the numbers.
+        query = query.strip()
+        if not query:
+            return np.zeros(0, dtype=np.int64)
+        find = TextSearchIndex.prefix if prefix else TextSearchIndex.substring
+        rows = np.unique(find(self.names, query.lower()))
+        if re.match(PHONE_ALLOWED_PATTERN, query) and len(NON_DIGIT_PATTERN.sub("", query)) >= PHONE_QUERY_MIN_DIGITS:
+            rows = np.union1d(rows, find(self.phones, self.query_phone_digits(query)))
+        return rows
+
+
+# Writing DataFrames to CSV in row slices so long saves can report progress and be
+# cancelled. Frames with identical columns are written one after another instead of
+# being concatenated into one more full copy first.
+def align_frames(frames):
+    columns = frames[0].columns
+    if all(df.columns.equals(columns) for df in frames[1:]):
+        return frames
+    return [pd.concat(frames, ignore_index=True)]
+
+
+def write_frames_to_csv(frames, output_path, progress=None, metrics=NO_METRICS):
+    with metrics.stage("transform"):
+        frames = align_frames(frames)
+    total = sum(len(df) for df in frames)
+    written = 0
+    try:
+        with open(output_path, mode='w', newline='') as file:
+            header = True
+            for df in frames:
+                for start in range(0, max(len(df), 1), CSV_WRITE_CHUNK_ROWS):
+                    chunk = df.iloc[start:start + CSV_WRITE_CHUNK_ROWS]
+                    with metrics.stage("render"):
+                        text = chunk.to_csv(index=False, header=header)
+                    with metrics.stage("write"):
+                        file.write(text)
+                    header = False
+                    written += len(chunk)
+                    if progress:
+                        progress(written, total, "rows")
+    except BaseException:
+        remove_partial_output(output_path)
+        raise
+    metrics.add(rows=written, bytes_written=os.path.getsize(output_path))
+    return written
+
+
+def open_columnar_writer(output_path, schema):
+    pa = import_pyarrow()
+    if COLUMNAR_FORMATS[Path(output_path).suffix.lower()] == "parquet":
+        return importlib.import_module("pyarrow.parquet").ParquetWriter(output_path, schema, compression="zstd")
+    return pa.ipc.new_file(output_path, schema, options=pa.ipc.IpcWriteOptions(compression="zstd"))
+
+
+def write_frames_to_columnar(frames, output_path, progress=None, metrics=NO_METRICS):
+    # Written in CSV_WRITE_CHUNK_ROWS slices (Parquet row groups / Arrow record batches)
+    # so long saves still report progress and can be cancelled
+    pa = import_pyarrow()
+    with metrics.stage("transform"):
+        frames = align_frames(frames)
+        if any(not df.dtypes.equals(frames[0].dtypes) for df in frames[1:]):
+            # One file has one schema, e.g. a phone column read as numbers in one file and text in another
+            frames = [pd.concat(frames, ignore_index=True)]
+    total = sum(len(df) for df in frames)
+    written = 0
+    writer = None
+    try:
+        for df in frames:
+            # Object columns may mix numbers and text, which Arrow cannot store in one column
+            text_columns = {column: "string" for column in df.columns if df[column].dtype == object}
+            for start in range(0, max(len(df), 1), CSV_WRITE_CHUNK_ROWS):
+                chunk = df.iloc[start:start + CSV_WRITE_CHUNK_ROWS]
+                with metrics.stage("render"):
+                    chunk = chunk.astype(text_columns) if text_columns else chunk
+                    if writer is None:
+                        table = pa.Table.from_pandas(chunk, preserve_index=False)
+                        schema = table.schema
+                        writer = open_columnar_writer(output_path, schema)
+                    else:
+                        table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+                with metrics.stage("write"):
+                    writer.write_table(table)
+                written += len(chunk)
+                if progress:
+                    progress(written, total, "rows")
+        with metrics.stage("write"):
+            writer.close()
+    except BaseException:
+        if writer is not None:
+            with contextlib.suppress(Exception):
+                writer.close()
+        remove_partial_output(output_path)
+        raise
+    metrics.add(rows=written, bytes_written=os.path.getsize(output_path))
+    return written
+
+
+def write_frames(frames, output_path, progress=None, metrics=NO_METRICS):
+    # The format follows the output's extension: Parquet, Arrow or CSV
+    if is_columnar_path(output_path):
+        return write_frames_to_columnar(frames, output_path, progress, metrics)
+    return write_frames_to_csv(frames, output_path, progress, metrics)
+
+
+# Merging. Files are ordered by the last number in their name; files without a number
+# go after the numbered ones, by name.
+def merge_sort_key(file_path):
+    name = os.path.basename(file_path)
+    numbers = re.findall(r'\d+', name)
+    return (0, int(numbers[-1]), "") if numbers else (1, 0, name)
+
+
+class ProgressFile:
+    # Binary file for parsers that read a whole file in one call (pandas): every read
+    # reports the position through progress(done, total, "KB"), which may raise to cancel
+    def __init__(self, file, progress):
+        self.file = file
+        self.progress = progress
+        self.total = os.fstat(file.fileno()).st_size // 1024
+
+    def read(self, size=-1):
+        data = self.file.read(size)
+        self.progress(self.file.tell() // 1024, self.total, "KB")
+        return data
+
+    def read1(self, size=-1):  # What the text wrapper pandas puts around the file calls
+        data = self.file.read1(size)
+        self.progress(self.file.tell() // 1024, self.total, "KB")
+        return data
+
+    def __iter__(self):
+        return iter(self.file)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+
+def read_csv_file(file_path, metrics=NO_METRICS, progress=None):
+    # pandas reads and parses in one call, so the whole load counts as parsing
+    with metrics.stage("parse"):
+        if progress is None:
+            df = pd.read_csv(file_path)
+        else:
+            with open(file_path, mode='rb') as file:
+                df = pd.read_csv(ProgressFile(file, progress))
+    metrics.add(bytes_read=os.path.getsize(file_path), rows_read=len(df))
+    return df
+
+
+# Columnar session files. Parquet and Arrow IPC (Feather) keep typed columns, so a
+# saved contact set reopens without parsing any text, and compacted frames keep their
+# categorical and Arrow string columns. Both formats need pyarrow; CSV never does.
+def is_columnar_path(file_path):
+    return Path(file_path).suffix.lower() in COLUMNAR_FORMATS
+
+
+def import_pyarrow():
+    try:
+        return importlib.import_module("pyarrow")
+    except ImportError:
+        raise RuntimeError("Parquet and Arrow files need the pyarrow package (pip install pyarrow).") from None
+
+
+def compact_frame(df, columns=None):
+    # Text columns with few distinct values become categories, the others Arrow-backed
+    # strings when pyarrow is installed. Changes df in place.
+    try:
+        import_pyarrow()
+        string_dtype = "string[pyarrow]"
+    except RuntimeError:
+        string_dtype = None
+    for column in df.columns if columns is None else columns:
+        values = df[column]
+        if values.dtype != object and not isinstance(values.dtype, pd.StringDtype):
+            continue  # Numbers and existing categories are compact already
+        if values.nunique() <= len(values) * CATEGORY_MAX_RATIO:
+            df[column] = values.astype("category")
+        elif string_dtype is not None and values.dtype != string_dtype:
+            df[column] = values.astype(string_dtype)
+    return df
+
+
+def read_columnar_file(file_path, metrics=NO_METRICS):
+    import_pyarrow()
+    # The columns are stored decoded, so loading them is all reading
+    with metrics.stage("read"):
+        if COLUMNAR_FORMATS[Path(file_path).suffix.lower()] == "parquet":
+            df = pd.read_parquet(file_path)
+        else:
+            df = pd.read_feather(file_path)
+    metrics.add(bytes_read=os.path.getsize(file_path), rows_read=len(df))
+    return df
+
+
+def read_frame_file(file_path, metrics=NO_METRICS, compact=False, cache=None, progress=None):
+    # With a FrameCache, files parsed before (and unchanged since) are not parsed again.
+    # CSV files report how far they have been read through progress(done, total, "KB").
+    if cache is not None:
+        return cache.read(file_path, metrics, compact, progress)
+    if is_columnar_path(file_path):
+        df = read_columnar_file(file_path, metrics)
+    else:
+        df = read_csv_file(file_path, metrics, progress)
+    if compact:
+        with metrics.stage("transform"):
+            compact_frame(df)
+    return df
+
+
+def read_csv_files(file_paths, progress=None, metrics=NO_METRICS, compact=False, cache=None):
+    # Also reads Parquet and Arrow files. Files that fail to load are reported in
+    # errors instead of stopping the rest.
+    dfs = []
+    sources = []
+    errors = []
+    batch_progress = BatchProgress(progress, file_paths)
+    for file_path in file_paths:
+        try:
+            dfs.append(read_frame_file(file_path, metrics, compact, cache, batch_progress.file(file_path)))
+            sources.append(file_path)
+        except Exception as e:
+            errors.append(f"Failed to load {file_path}: {str(e)}")
+        batch_progress.finish(file_path)
+    return dfs, sources, errors
+
+
+# Parsed files shared by every tab. Entries are keyed by path and checked against the
+# file's size and mtime on every lookup, so an edited file is parsed again. Once the
+# frames pass the memory budget the least recently used are dropped. Callers get
+# shallow copies: replacing a column (as renaming and compacting do) leaves the cached
+# frame alone, but changing values in place would not.
+class FrameCache:
+    def __init__(self, max_mb=None):
+        if max_mb is None:
+            max_mb = float(os.environ.get(FRAME_CACHE_ENV) or FRAME_CACHE_MB)
+        self.max_bytes = int(max_mb * 2**20)
+        self.entries = OrderedDict()  # (path, compact) -> (size, mtime_ns, frame, bytes)
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        # Background jobs read through the cache while the UI thread may clear it
+        self.lock = threading.Lock()
+
+    def key(self, file_path, compact):
+        return (os.path.abspath(file_path), bool(compact))
+
+    def read(self, file_path, metrics=NO_METRICS, compact=False, progress=None):
+        key = self.key(file_path, compact)
+        # Stat before parsing, so a file changed mid-read is not cached as the new version
+        stat = os.stat(file_path)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[:2] == (stat.st_size, stat.st_mtime_ns):
+                self.entries.move_to_end(key)
+                self.hits += 1
+                metrics.add(rows_read=len(entry[2]))
+                return entry[2].copy(deep=False)
+            self.misses += 1
+        df = read_frame_file(file_path, metrics, compact, progress=progress)
+        self.put(key, stat, df)
+        return df.copy(deep=False)
+
+    def put(self, key, stat, df):
+        nbytes = int(df.memory_usage(deep=True).sum())
+        with self.lock:
+            self.discard(key)
+            if nbytes > self.max_bytes:
+                return
+            self.entries[key] = (stat.st_size, stat.st_mtime_ns, df, nbytes)
+            self.total_bytes += nbytes
+            while self.total_bytes > self.max_bytes:
+                self.discard(next(iter(self.entries)))
+
+    def discard(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[3]
+
+    def set_budget(self, max_mb):
+        with self.lock:
+            self.max_bytes = int(max_mb * 2**20)
+            while self.total_bytes > self.max_bytes:
+                self.discard(next(iter(self.entries)))
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.total_bytes = 0
+
+    def summary(self):
+        return (f"File cache: {len(self.entries)} file(s), {self.total_bytes / 2**20:.1f} of "
+                f"{self.max_bytes / 2**20:.0f} MB, {self.hits:,} hit(s), {self.misses:,} miss(es)")
+
+
+FRAME_CACHE = FrameCache()
+
+
+def filter_frames(frames, sources, dedup_index=None, normalizer=None, metrics=NO_METRICS):
+    filtered = []
+    with metrics.stage("transform"):
+        for df, source in zip(frames, sources):
+            if normalizer is not None:
+                df = normalizer.filter_frame(df, source)
+            if dedup_index is not None:
+                df = dedup_index.filter_frame(df, source)
+            filtered.append(df)
+    return filtered
+
+
+def merge_csv_files_in_memory(file_paths, output_path, progress=None, dedup_index=None, normalizer=None, metrics=NO_METRICS,
+                              cache=None):
+    # Reads every file with pandas, so differing columns are aligned by name. Inputs and
+    # output may also be Parquet or Arrow files.
+    df_list = []
+    batch_progress = BatchProgress(progress, file_paths)
+    for file_path in file_paths:
+        df = read_frame_file(file_path, metrics, cache=cache, progress=batch_progress.file(file_path))
+        df_list.extend(filter_frames([df], [file_path], dedup_index, normalizer, metrics))
+        batch_progress.finish(file_path)
+    write_frames(df_list, output_path, progress, metrics)
+    return output_path
+
+
+def read_csv_header(file):
+    # Consume the header record from a binary file, including quoted fields spanning lines
+    header = file.readline()
+    while header.count(b'"') % 2:
+        line = file.readline()
+        if not line:
+            break
+        header += line
+    return header
+
+
+def parse_csv_header(header):
+    return next(csv.reader(io.StringIO(header.decode('utf-8-sig'))), [])
+
+
+def check_merge_headers(file_paths, metrics=NO_METRICS):
+    # Raw header bytes of every file, after checking they all parse to the same columns
+    headers = {}
+    with metrics.stage("parse"):
+        for file_path in file_paths:
+            with open(file_path, mode='rb') as file:
+                headers[file_path] = read_csv_header(file)
+
+        first_path = file_paths[0]
+        expected = parse_csv_header(headers[first_path])
+        mismatched = [os.path.basename(p) for p in file_paths if parse_csv_header(headers[p]) != expected]
+    if mismatched:
+        raise ValueError(f"Headers differ from {os.path.basename(first_path)} in: {', '.join(mismatched)}")
+    return headers
+
+
+def stream_merge_csv_files(file_paths, output_path, progress=None, dedup_index=None, normalizer=None, metrics=NO_METRICS):
+    # Out-of-core merge: check every header first, then copy each file's data rows to
+    # the output in MERGE_COPY_CHUNK_SIZE pieces, so memory does not grow with input size.
+    # Rows are copied as-is rather than re-parsed, so all headers must match exactly.
+    if any(is_columnar_path(path) for path in [*file_paths, output_path]):
+        raise ValueError("The streaming merge only reads and writes CSV files; use the normal merge for Parquet or Arrow files.")
+    headers = check_merge_headers(file_paths, metrics)
+    first_path = file_paths[0]
+
+    if dedup_index is not None or normalizer is not None:
+        return stream_merge_filtered_rows(file_paths, output_path, progress, dedup_index, normalizer, metrics)
+
+    total = sum(os.path.getsize(p) for p in file_paths)
+    done = 0
+    # Rows are not parsed here, so they are counted as the line breaks copied
+    lines = 0
+    try:
+        with open(output_path, mode='wb') as output:
+            header = headers[first_path].removeprefix(codecs.BOM_UTF8)
+            line_ending = b"\r\n" if header.endswith(b"\r\n") else b"\n"
+            output.write(header)
+            ends_with_newline = header.endswith(b"\n")
+            for file_path in file_paths:
+                with open(file_path, mode='rb') as file:
+                    done += len(read_csv_header(file))
+                    first_chunk = True
+                    while True:
+                        with metrics.stage("read"):
+                            chunk = file.read(MERGE_COPY_CHUNK_SIZE)
+                        if not chunk:
+                            break
+                        with metrics.stage("write"):
+                            # The previous file may not end with a newline
+                            if first_chunk and not ends_with_newline:
+                                output.write(line_ending)
+                            first_chunk = False
+                            output.write(chunk)
+                        ends_with_newline = chunk.endswith(b"\n")
+                        lines += chunk.count(b"\n")
+                        done += len(chunk)
+                        if progress:
+                            progress(done // 1024, total // 1024, "KB")
+    except BaseException:
+        remove_partial_output(output_path)
+        raise
+    rows = lines + (0 if ends_with_newline else 1)
+    metrics.add(rows=rows, bytes_read=total, bytes_written=os.path.getsize(output_path), rows_read=rows)
+    return output_path
+
+
+def iter_filtered_rows(file_paths, progress=None, dedup_index=None, normalizer=None, metrics=NO_METRICS):
+    # Parses every file with the csv module and yields (header, rows) in batches of
+    # MERGE_PROGRESS_ROWS, with the phone columns normalized and duplicates dropped. Each
+    # file starts with an empty batch so callers see its header even if it has no rows.
+    # Each batch's phone columns are normalized in one vectorized call.
+    total = sum(os.path.getsize(p) for p in file_paths)
+    done = 0
+    for file_path in file_paths:
+        with open(file_path, mode='r', newline='', encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if header is None:
+                continue
+            yield header, []
+
+            phone_columns = find_phone_columns(header)
+            width = len(phone_columns)
+            if dedup_index is not None:
+                dedup_index.count_duplicates(file_path, 0)
+            while True:
+                with metrics.stage("parse"):
+                    rows = list(itertools.islice(reader, MERGE_PROGRESS_ROWS))
+                if not rows:
+                    break
+                metrics.add(rows_read=len(rows))
+                with metrics.stage("transform"):
+                    if normalizer is not None:
+                        # As in PhoneNormalizer.filter_frame: invalid numbers are blanked and
+                        # a row goes only when all of its non-blank numbers are invalid
+                        phones = pd.Series([row[i] if i < len(row) else "" for row in rows for i in phone_columns], dtype=object)
+                        normalized, rejected = normalizer.normalize(phones, file_path)
+                        values = normalized.tolist()
+                        invalid = rejected.tolist()
+                        kept_rows = []
+                        for n, row in enumerate(rows):
+                            row_values = values[n * width:(n + 1) * width]
+                            if any(invalid[n * width:(n + 1) * width]) and not any(isinstance(v, str) for v in row_values):
+                                continue
+                            for i, value in zip(phone_columns, row_values):
+                                if i < len(row):
+                                    row[i] = value if isinstance(value, str) else ""
+                            kept_rows.append(row)
+                        rows = kept_rows
+                    if dedup_index is not None:
+                        # Every phone column is checked, as in PhoneIndex.filter_frame
+                        unique_rows = []
+                        dropped = 0
+                        for row in rows:
+                            columns = [i for i in phone_columns if i < len(row)]
+                            duplicates, keep = dedup_index.check_keys([phone_key(row[i], dedup_index.country_code) for i in columns])
+                            dropped += sum(duplicates)
+                            if keep:
+                                for i, duplicate in zip(columns, duplicates):
+                                    if duplicate:
+                                        row[i] = ""
+                                unique_rows.append(row)
+                        dedup_index.count_duplicates(file_path, dropped)
+                        rows = unique_rows
+                yield header, rows
+                if progress:
+                    progress((done + file.buffer.tell()) // 1024, total // 1024, "KB")
+        done += os.path.getsize(file_path)
+        if progress:
+            progress(done // 1024, total // 1024, "KB")
+
+
+def stream_merge_filtered_rows(file_paths, output_path, progress=None, dedup_index=None, normalizer=None, metrics=NO_METRICS):
+    # Normalizing or deduplicating needs each row's phone number, so rows are parsed
+    # and re-written in batches instead of being copied as raw bytes
+    written = 0
+    # Rows are formatted into a memory buffer per batch, so rendering and writing are timed apart
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator=os.linesep)
+    try:
+        with open(output_path, mode='w', newline='', encoding='utf-8') as output:
+            header_written = False
+            for header, rows in iter_filtered_rows(file_paths, progress, dedup_index, normalizer, metrics):
+                if not header_written:
+                    writer.writerow(header)
+                    header_written = True
+                with metrics.stage("render"):
+                    writer.writerows(rows)
+                with metrics.stage("write"):
+                    output.write(buffer.getvalue())
+                buffer.seek(0)
+                buffer.truncate()
+                written += len(rows)
+    except BaseException:
+        remove_partial_output(output_path)
+        raise
+    metrics.add(rows=written, bytes_read=sum(os.path.getsize(p) for p in file_paths),
+                bytes_written=os.path.getsize(output_path))
+    return output_path
+
+
+def row_sort_key(sort_by, header):
+    # Names sort case-insensitively and phone numbers by their digits; rows with an
+    # empty value go last. Ties keep their input order.
+    by_phone = sort_by == "phone"
+    column = find_phone_column(header) if by_phone else 0
+
+    def key(row):
+        value = row[column].strip() if column < len(row) else ""
+        value = NON_DIGIT_PATTERN.sub("", value) if by_phone else value.casefold()
+        return (not value, value)
+    return key
+
+
+def write_sort_run(rows, run_dir, metrics=NO_METRICS):
+    # Spills sorted rows (a list or a merged iterator) to a temporary CSV file
+    fd, run_path = tempfile.mkstemp(suffix=".csv", dir=run_dir)
+    with metrics.stage("write"):
+        with open(fd, mode='w', newline='', encoding='utf-8') as file:
+            csv.writer(file).writerows(rows)
+    return run_path
+
+
+def merge_sort_runs(run_paths, key, stack):
+    # Lazily merged rows of already sorted run files; the files close with the stack.
+    # heapq.merge takes equal keys from earlier runs first, so the sort stays stable.
+    readers = [csv.reader(stack.enter_context(open(run_path, mode='r', newline='', encoding='utf-8')))
+               for run_path in run_paths]
+    return heapq.merge(*readers, key=key)
+
+
+def sorted_merge_csv_files(file_paths, output_path, progress=None, dedup_index=None, normalizer=None,
+                           metrics=NO_METRICS, sort_by="name"):
+    # External merge sort: rows are read (normalized and deduplicated as in the streaming
+    # merge) into runs of SORT_RUN_ROWS, each run is sorted in memory and spilled to a
+    # temporary file, and the runs are then k-way merged into the output. Memory stays at
+    # about one run however large the inputs are. Input that fits in a single run is
+    # sorted and written directly without temporary files.
+    if any(is_columnar_path(path) for path in [*file_paths, output_path]):
+        raise ValueError("The sorted merge only reads and writes CSV files; use the normal merge for Parquet or Arrow files.")
+    check_merge_headers(file_paths, metrics)
+    if sort_by not in SORT_KEYS:
+        raise ValueError(f"Unknown sort key {sort_by!r}; use one of: {', '.join(SORT_KEYS)}")
+
+    # Temporary runs go next to the output, which has to have room for the same data anyway
+    output_dir = os.path.dirname(os.path.abspath(output_path))
+    header = None
+    key = None
+    run = []
+    run_paths = []
+    total_rows = 0
+    written = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator=os.linesep)
+    try:
+        with contextlib.ExitStack() as stack:
+            run_dir = None
+            for file_header, rows in iter_filtered_rows(file_paths, progress, dedup_index, normalizer, metrics):
+                if header is None:
+                    header = file_header
+                    key = row_sort_key(sort_by, header)
+                run.extend(rows)
+                total_rows += len(rows)
+                if len(run) >= SORT_RUN_ROWS:
+                    with metrics.stage("transform"):
+                        run.sort(key=key)
+                    if run_dir is None:
+                        run_dir = stack.enter_context(tempfile.TemporaryDirectory(
+                            prefix="csv-vcf-sort-", dir=output_dir))
+                    run_paths.append(write_sort_run(run, run_dir, metrics))
+                    run = []
+            with metrics.stage("transform"):
+                run.sort(key=key)
+            if run_paths and run:
+                run_paths.append(write_sort_run(run, run_dir, metrics))
+                run = []
+
+            # Too many runs to keep open at once are first merged into fewer, longer ones
+            while len(run_paths) > SORT_MAX_OPEN_RUNS:
+                groups = [run_paths[i:i + SORT_MAX_OPEN_RUNS] for i in range(0, len(run_paths), SORT_MAX_OPEN_RUNS)]
+                run_paths = []
+                for done, group in enumerate(groups, start=1):
+                    with contextlib.ExitStack() as group_stack:
+                        run_paths.append(write_sort_run(merge_sort_runs(group, key, group_stack), run_dir, metrics))
+                    for run_path in group:
+                        os.remove(run_path)
+                    if progress:
+                        progress(done, len(groups), "runs combined")
+
+            merged = merge_sort_runs(run_paths, key, stack) if run_paths else iter(run)
+            with open(output_path, mode='w', newline='', encoding='utf-8') as output:
+                if header is not None:
+                    writer.writerow(header)
+                while True:
+                    with metrics.stage("transform"):
+                        rows = list(itertools.islice(merged, MERGE_PROGRESS_ROWS))
+                    if not rows:
+                        break
+                    with metrics.stage("render"):
+                        writer.writerows(rows)
+                    with metrics.stage("write"):
+                        output.write(buffer.getvalue())
+                    buffer.seek(0)
+                    buffer.truncate()
+                    written += len(rows)
+                    if progress:
+                        progress(written, total_rows, "rows merged")
+                # The header alone when no file had any rows
+                with metrics.stage("write"):
+                    output.write(buffer.getvalue())
+    except BaseException:
+        remove_partial_output(output_path)
+        raise
+    metrics.add(rows=written, bytes_read=sum(os.path.getsize(p) for p in file_paths),
+                bytes_written=os.path.getsize(output_path))
+    return output_path
+
+
+def format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
@@ -0,0 +1,38 @@
+"""The command line reports failures as one line and a non-zero exit status."""
+import csv
+
+import csv_vcf_cli
+
+
+def write_csv(path, header, rows):
+    with open(path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def run(tmp_path, *args):
+    return csv_vcf_cli.main(["-q", "--metrics-log", str(tmp_path / "metrics.jsonl"), *args])
+
+
+def test_engine_errors_exit_without_a_traceback(tmp_path, capsys):
+    write_csv(tmp_path / "a.csv", ["Name", "Phone"], [["A", "0712000001"]])
+    write_csv(tmp_path / "b.csv", ["Name", "Tel"], [["B", "0712000002"]])
+    assert run(tmp_path, "merge", str(tmp_path / "*.csv"), "-o", str(tmp_path / "out.csv"), "--sort-by", "name") == 1
+    error = capsys.readouterr().err
+    assert error.startswith("error: Headers differ") and "Traceback" not in error
+    assert '"status": "error"' in (tmp_path / "metrics.jsonl").read_text()
+
+
+def test_missing_inputs_exit_with_2(tmp_path, capsys):
+    assert run(tmp_path, "merge", str(tmp_path / "none*.csv"), "-o", str(tmp_path / "out.csv")) == 2
+    assert capsys.readouterr().err.startswith("error: no input files match")
+
+
+def test_dedup_merge(tmp_path, capsys):
+    write_csv(tmp_path / "a.csv", ["Name", "Phone"], [["A", "0712000001"], ["B", "0712000002"]])
+    write_csv(tmp_path / "b.csv", ["Name", "Phone"], [["C", "+254712000001"], ["D", "0712000003"]])
+    output_path = tmp_path / "out.csv"
+    assert run(tmp_path, "merge", str(tmp_path / "?.csv"), "-o", str(output_path), "--streaming", "--dedup") == 0
+    with open(output_path, newline='') as file:
+        assert [row[0] for row in csv.reader(file)] == ["Name", "A", "B", "D"]
@@ -0,0 +1,61 @@
+"""Incremental conversion skips unchanged inputs and rebuilds missing or damaged outputs."""
+import csv
+import os
+
+import pytest
+
+import csv_vcf_engine as engine
+
+
+@pytest.fixture
+def contacts_csv(tmp_path):
+    path = tmp_path / "in" / "contacts.csv"
+    path.parent.mkdir()
+    with open(path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Name", "Phone Number 1"])
+        writer.writerows([f"Contact {i:04d}", f"07{i:08d}"] for i in range(250))
+    return str(path)
+
+
+def convert(source, output_dir, shard_limits=None):
+    results, skipped = engine.convert_files_incremental([source], str(output_dir), "csv2vcf", 1,
+                                                        shard_limits=shard_limits)
+    assert results[0][2] is None
+    return results[0][1], skipped
+
+
+def test_unchanged_input_is_skipped(tmp_path, contacts_csv):
+    output_path, skipped = convert(contacts_csv, tmp_path)
+    assert skipped == []
+    os.utime(contacts_csv)  # Touched but not changed
+    assert convert(contacts_csv, tmp_path)[1] == [contacts_csv]
+
+
+def test_changed_input_or_output_is_rebuilt(tmp_path, contacts_csv):
+    output_path, _ = convert(contacts_csv, tmp_path)
+    with open(contacts_csv, mode='a') as file:
+        file.write("Late,0799999999\n")
+    assert convert(contacts_csv, tmp_path)[1] == []
+    with open(output_path, mode='r+') as file:
+        file.truncate(10)
+    assert convert(contacts_csv, tmp_path)[1] == []
+    assert os.path.getsize(output_path) > 10
+
+
+@pytest.mark.parametrize("damage", ["delete", "truncate"])
+def test_damaged_shard_is_rebuilt(tmp_path, contacts_csv, damage):
+    limits = engine.ShardLimits(max_contacts=100)
+    index_path, _ = convert(contacts_csv, tmp_path, limits)
+    shard = tmp_path / "contacts_0002.vcf"
+    size = shard.stat().st_size
+    assert convert(contacts_csv, tmp_path, limits)[1] == [contacts_csv]
+
+    if damage == "delete":
+        shard.unlink()
+    else:
+        with open(shard, mode='r+') as file:
+            file.truncate(size // 2)
+    assert convert(contacts_csv, tmp_path, limits)[1] == []
+    assert shard.stat().st_size == size
+    assert convert(contacts_csv, tmp_path, limits)[1] == [contacts_csv]
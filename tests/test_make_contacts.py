@@ -0,0 +1,34 @@
+"""The streaming Bulk CSV Maker against the paste path (make_contacts_frame)."""
+import csv
+
+import pytest
+
+import csv_vcf_engine as engine
+
+pytest.importorskip("pandas")
+
+
+def test_matches_the_paste_path(tmp_path):
+    numbers = ["0712000001", "", "bad", "+254712000002", " 0712000003 "] * 3 + ["nope"] * 990
+    source = tmp_path / "numbers.txt"
+    source.write_text("\n".join(numbers) + "\n")
+    output_path = tmp_path / "made.csv"
+    count = engine.stream_make_contacts([str(source)], str(output_path), "G", 1, engine.PhoneNormalizer("254"))
+
+    df, _ = engine.make_contacts_frame(numbers, "G", 1, "254")
+    engine.write_frames_to_csv([df], str(tmp_path / "pasted.csv"))
+    assert count == 9
+    assert output_path.read_bytes() == (tmp_path / "pasted.csv").read_bytes()
+    assert output_path.read_text().splitlines()[1] == "G 001,+254712000001"  # Padded from the 9 kept
+    assert [p.name for p in tmp_path.iterdir() if p.suffix == ".tmp"] == []
+
+
+def test_progress_total_counts_only_numbers(tmp_path):
+    source = tmp_path / "numbers.csv"
+    with open(source, mode='w', newline='') as file:
+        csv.writer(file).writerows([["Name", "Mobile"], ["A", "0712000001"], ["B", ""], ["C", "0712000002"]])
+    reports = []
+    engine.stream_make_contacts([str(source)], str(tmp_path / "made.csv"), "G", 1, None,
+                                lambda *report: reports.append(report))
+    read = [(done, total) for done, total, unit in reports if unit == "numbers read"]
+    assert read[-1] == (2, 2)
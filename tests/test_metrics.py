@@ -0,0 +1,37 @@
+"""Peak memory in OperationMetrics is the operation's own, or labelled as the process's."""
+import sys
+
+import pytest
+
+import csv_vcf_engine as engine
+
+
+def run_operation(name, allocate_mb=0):
+    metrics = engine.OperationMetrics(name)
+    metrics.start()
+    data = bytearray(allocate_mb * 2**20)
+    data[::4096] = b"x" * len(data[::4096])  # Touch every page so it is resident
+    del data
+    metrics.finish()
+    return metrics
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="the high-water mark is only resettable on Linux")
+def test_peak_is_per_operation():
+    big = run_operation("Big", 200)
+    small = run_operation("Small")
+    assert big.peak_rss_scope == small.peak_rss_scope == "operation"
+    assert small.peak_rss < big.peak_rss - 100 * 2**20
+    assert small.record()["peak_rss_scope"] == "operation"
+    assert "peak memory" in small.summary()
+
+
+def test_nested_operation_is_labelled_as_process_peak():
+    outer = engine.OperationMetrics("Outer")
+    outer.start()
+    inner = run_operation("Inner")
+    outer.finish()
+    assert not inner.peak_reset  # Resetting would have erased the outer operation's peak
+    if inner.peak_rss is not None and inner.peak_rss_scope == "process":
+        assert "process peak memory" in inner.summary()
+    assert engine.OperationMetrics.running == 0
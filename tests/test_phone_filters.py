@@ -0,0 +1,114 @@
+"""Phone normalization and deduplication on the table paths and the converter."""
+import csv
+
+import pytest
+
+import csv_vcf_engine as engine
+
+HEADER = ["Name", "Phone Number 1", "Phone Number 2"]
+
+
+def write_csv(path, rows, header=HEADER):
+    with open(path, mode='w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return str(path)
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as file:
+        return [row for row in csv.reader(file)][1:]
+
+
+def merge(kind, paths, output_path, dedup_index, normalizer):
+    if kind == "in_memory":
+        engine.merge_csv_files_in_memory(paths, output_path, None, dedup_index, normalizer)
+    elif kind == "streaming":
+        engine.stream_merge_csv_files(paths, output_path, None, dedup_index, normalizer)
+    else:
+        engine.sorted_merge_csv_files(paths, output_path, None, dedup_index, normalizer, sort_by="name")
+    return read_rows(output_path)
+
+
+MERGES = ["in_memory", "streaming", "sorted"]
+
+
+@pytest.fixture
+def multi_phone_files(tmp_path):
+    # The same numbers in national and international form, spread across both columns
+    return [
+        write_csv(tmp_path / "a.csv", [["A", "0712000001", "0712000002"], ["B", "bad", "0712000003"]]),
+        write_csv(tmp_path / "b.csv", [["C", "+254712000002", ""], ["D", "xyz", "nope"], ["E", "", ""]]),
+        write_csv(tmp_path / "c.csv", [["F", "0712000004", "254712000001"], ["G", "0712000003", "+254 712 000 005"]]),
+    ]
+
+
+@pytest.mark.parametrize("kind", MERGES)
+def test_normalize_checks_every_phone_column(tmp_path, multi_phone_files, kind):
+    normalizer = engine.PhoneNormalizer("254")
+    rows = merge(kind, multi_phone_files, str(tmp_path / "out.csv"), None, normalizer)
+    rows = sorted(rows)
+    assert rows == [
+        ["A", "+254712000001", "+254712000002"],
+        ["B", "", "+254712000003"],  # a bad first number does not drop a valid second one
+        ["C", "+254712000002", ""],
+        ["E", "", ""],  # no numbers at all: kept, as the converter does
+        ["F", "+254712000004", "+254712000001"],
+        ["G", "+254712000003", "+254712000005"],
+    ]
+    assert sum(normalizer.rejected.values()) == 3
+
+
+@pytest.mark.parametrize("kind", MERGES)
+def test_normalize_then_dedup_matches_across_columns(tmp_path, multi_phone_files, kind):
+    normalizer = engine.PhoneNormalizer("254")
+    with engine.PhoneIndex() as dedup_index:
+        rows = merge(kind, multi_phone_files, str(tmp_path / "out.csv"), dedup_index, normalizer)
+        # C's only number repeats A's second; F's second repeats A's first; G's first repeats B's
+        assert sum(dedup_index.duplicates.values()) == 3
+    names = sorted(row[0] for row in rows)
+    assert names == ["A", "B", "E", "F", "G"]
+    assert sorted(rows)[3] == ["F", "+254712000004", ""]
+
+
+def test_table_paths_match_the_converter(tmp_path, multi_phone_files):
+    normalizer = engine.PhoneNormalizer("254")
+    contacts = []
+    for path in multi_phone_files:
+        contacts.extend(normalizer.filter_contacts(engine.iter_csv_contacts(path), path))
+    rows = merge("streaming", multi_phone_files, str(tmp_path / "out.csv"), None, engine.PhoneNormalizer("254"))
+    assert [(row[0], [phone for phone in row[1:] if phone]) for row in rows] == contacts
+
+
+def test_filter_frame_blanks_invalid_numbers():
+    pd = pytest.importorskip("pandas")
+    df = pd.DataFrame({"Name": ["A", "B", "C"], "Phone Number 1": ["bad", "0712000001", "x"],
+                       "Phone Number 2": ["0712000002", None, None]})
+    filtered = engine.PhoneNormalizer("254").filter_frame(df, "frame")
+    assert filtered["Name"].tolist() == ["A", "B"]
+    assert filtered["Phone Number 2"].tolist()[0] == "+254712000002"
+    assert pd.isna(filtered["Phone Number 1"].tolist()[0])
+
+
+@pytest.mark.parametrize("kind", MERGES)
+def test_dedup_alone_compares_e164_forms(tmp_path, multi_phone_files, kind):
+    with engine.PhoneIndex("254") as dedup_index:
+        rows = merge(kind, multi_phone_files, str(tmp_path / "out.csv"), dedup_index, None)
+        assert sum(dedup_index.duplicates.values()) == 3
+    assert sorted(row[0] for row in rows) == ["A", "B", "D", "E", "F", "G"]
+
+
+def test_converter_dedup_compares_e164_forms():
+    contacts = [("A", ["0712 000 001"]), ("B", ["+254712000001"]), ("C", ["00254712000001", "712000002"]),
+                ("D", ["254712000002"])]
+    with engine.PhoneIndex("254") as dedup_index:
+        kept = list(dedup_index.filter_contacts(contacts, "contacts"))
+    assert kept == [("A", ["0712 000 001"]), ("C", ["712000002"])]
+
+
+def test_phone_keys_agree_with_normalization():
+    phones = ["0712345678", "+254 712-345-678", "00254712345678", "712345678", "254712345678", 712345678.0]
+    assert len({engine.phone_key(phone, "254") for phone in phones}) == 1
+    assert engine.phone_key_list(phones, "254") == [engine.phone_key(phone, "254") for phone in phones]
+    assert engine.phone_key("", "254") is None
@@ -0,0 +1,67 @@
+"""Progress and cancellation inside a single large file."""
+import csv
+
+import pytest
+
+import csv_vcf_engine as engine
+
+
+class Cancelled(Exception):
+    pass
+
+
+@pytest.fixture
+def big_csv(tmp_path):
+    path = tmp_path / "big.csv"
+    with open(path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Name", "Phone Number 1"])
+        writer.writerows([f"Contact {i:06d}", f"07{i:08d}"] for i in range(5 * engine.CONVERT_PROGRESS_ROWS))
+    return str(path)
+
+
+def cancel_after(fraction):
+    reports = []
+
+    def progress(done, total, unit):
+        reports.append((done, total, unit))
+        if total and done > total * fraction:
+            raise Cancelled()
+    return progress, reports
+
+
+def test_one_file_reports_while_converting(tmp_path, big_csv):
+    reports = []
+    results = engine.convert_files_parallel([big_csv], str(tmp_path), "csv2vcf", 1,
+                                            lambda *report: reports.append(report))
+    assert results[0][2] is None
+    assert len(reports) > 2
+    assert all(unit == "KB" for _, _, unit in reports)
+    assert [done for done, _, _ in reports] == sorted(done for done, _, _ in reports)
+    assert reports[-1][0] == reports[-1][1]
+
+
+@pytest.mark.parametrize("mode", ["csv2vcf", "vcf2csv"])
+def test_cancel_stops_the_batch_mid_file(tmp_path, big_csv, mode):
+    source = big_csv
+    if mode == "vcf2csv":
+        source = str(tmp_path / "big.vcf")
+        engine.stream_csv_to_vcf(big_csv, source)
+    output_dir = tmp_path / "out"
+    output_dir.mkdir()
+    progress, reports = cancel_after(0.3)
+    with pytest.raises(Cancelled):
+        engine.convert_files_parallel([source, source], str(output_dir), mode, 1, progress)
+    assert reports[-1][0] < reports[-1][1]  # Stopped inside the first file
+    assert list(output_dir.iterdir()) == []  # The partial output is removed
+
+
+def test_load_reports_and_cancels(big_csv):
+    pytest.importorskip("pandas")
+    reports = []
+    dfs, _, errors = engine.read_csv_files([big_csv], lambda *report: reports.append(report))
+    assert not errors and len(dfs[0]) == 5 * engine.CONVERT_PROGRESS_ROWS
+    assert len(reports) > 2
+    progress, _ = cancel_after(0.3)
+    with pytest.raises(Cancelled):
+        engine.read_csv_files([big_csv], progress)
@@ -0,0 +1,51 @@
+"""Sharded CSV -> VCF output is deterministic and adds up to the unsharded file."""
+import csv
+
+import pytest
+
+import csv_vcf_engine as engine
+
+
+@pytest.fixture
+def contacts_csv(tmp_path):
+    path = tmp_path / "contacts.csv"
+    with open(path, mode='w', newline='') as file:
+        writer = csv.writer(file)
+        writer.writerow(["Name", "Phone Number 1", "Phone Number 2"])
+        writer.writerows([f"Contact {i:04d}", f"07{i:08d}", f"+2547{i:08d}" if i % 3 else ""] for i in range(1000))
+    return str(path)
+
+
+def shard(contacts_csv, output_dir, limits):
+    output_dir.mkdir(exist_ok=True)
+    output_path = output_dir / "contacts.vcf"
+    count = engine.stream_csv_to_vcf_shards(contacts_csv, output_path, limits)
+    return count, {path.name: path.read_bytes() for path in sorted(output_dir.iterdir())}
+
+
+@pytest.mark.parametrize("limits", [engine.ShardLimits(max_contacts=300), engine.ShardLimits(max_mb=0.02),
+                                    engine.ShardLimits(max_contacts=300, max_mb=0.02)])
+def test_shards_are_deterministic_and_complete(tmp_path, contacts_csv, limits):
+    count, first = shard(contacts_csv, tmp_path / "a", limits)
+    _, second = shard(contacts_csv, tmp_path / "b", limits)
+    assert first == second
+    assert count == 1000
+
+    engine.stream_csv_to_vcf(contacts_csv, tmp_path / "whole.vcf")
+    shards = [data for name, data in first.items() if name != "contacts_index.csv"]
+    assert b"".join(shards) == (tmp_path / "whole.vcf").read_bytes()
+
+    with open(tmp_path / "a" / "contacts_index.csv", newline='') as file:
+        index = list(csv.DictReader(file))
+    assert [row["File"] for row in index] == [f"contacts_{n:04d}.vcf" for n in range(1, len(index) + 1)]
+    assert sum(int(row["Contacts"]) for row in index) == 1000
+    for row, data in zip(index, shards):
+        assert int(row["Bytes"]) == len(data)
+        if limits.max_contacts:
+            assert int(row["Contacts"]) <= limits.max_contacts
+
+
+def test_fewer_shards_remove_the_stale_ones(tmp_path, contacts_csv):
+    _, before = shard(contacts_csv, tmp_path / "out", engine.ShardLimits(max_contacts=100))
+    _, after = shard(contacts_csv, tmp_path / "out", engine.ShardLimits(max_contacts=400))
+    assert len(before) == 11 and len(after) == 4  # The shards plus the index
@@ -0,0 +1,58 @@
+"""The mmap byte scanner and the text parser must write the same CSV."""
+import locale
+
+import pytest
+
+import csv_vcf_engine as engine
+
+NAME = "Zoë Müller" if locale.getpreferredencoding(False).lower().replace("-", "") == "utf8" else "Zoe Muller"
+
+CARDS = [
+    "BEGIN:VCARD\nVERSION:2.1\nN:;Alice;;;\nFN:Alice\nTEL;CELL:+254712000001\nEND:VCARD\n",
+    # Folded name, a grouped property, several numbers and a photo to skip
+    "BEGIN:VCARD\nVERSION:3.0\nFN:Bob\n  the Builder\nitem1.TEL;TYPE=CELL:0712 000 002\n"
+    "tel;type=home:0712000003\nPHOTO;ENCODING=b:" + "QUJD" * 300 + "\n " + "REVG" * 300 + "\nEND:VCARD\n",
+    "BEGIN:VCARD\nVERSION:4.0\nFN:" + NAME + "\nTEL;VALUE=uri:tel:+254712000004\nNOTE:a; b: c\nend:vcard\n",
+    # No number: left out
+    "BEGIN:VCARD\nVERSION:3.0\nFN:Nobody\nEMAIL:nobody@example.com\nEND:VCARD\n",
+]
+LAST_CARD = "BEGIN:VCARD\nVERSION:3.0\nFN:Carol\nTEL:0712000005\nEND:VCARD"  # No final newline
+
+
+def convert(vcf_path, output_path, monkeypatch, mmap):
+    # Force one parser or the other, whatever the file would pick
+    monkeypatch.setattr(engine, "VCF_MMAP_THRESHOLD", 0 if mmap else float("inf"))
+    monkeypatch.setattr(engine, "VCF_MMAP_MIN_SKIPPED_SHARE", 0)
+    engine.stream_vcf_to_csv(str(vcf_path), str(output_path))
+    return output_path.read_bytes()
+
+
+@pytest.mark.parametrize("line_ending", ["\n", "\r\n"])
+@pytest.mark.parametrize("chunk_size", [64, 1024 * 1024])
+def test_parsers_agree(tmp_path, monkeypatch, line_ending, chunk_size):
+    # Small chunks put folds and card ends across chunk and window boundaries
+    monkeypatch.setattr(engine, "VCF_READ_CHUNK_SIZE", chunk_size)
+    vcf_path = tmp_path / "contacts.vcf"
+    with open(vcf_path, mode='w', newline='') as file:
+        file.write(("".join(CARDS * 40) + LAST_CARD).replace("\n", line_ending))
+
+    text = convert(vcf_path, tmp_path / "text.csv", monkeypatch, mmap=False)
+    scanned = convert(vcf_path, tmp_path / "mmap.csv", monkeypatch, mmap=True)
+    assert scanned == text
+    rows = text.decode(locale.getpreferredencoding(False)).splitlines()
+    assert len(rows) == 1 + 3 * 40 + 1
+    assert rows[1:4] == [
+        "Alice,+254712000001,",
+        "Bob the Builder,0712 000 002,0712000003",
+        f"{NAME},+254712000004,",
+    ]
+    assert rows[-1] == "Carol,0712000005,"
+
+
+def test_scanner_is_picked_only_when_it_pays_off(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine, "VCF_MMAP_THRESHOLD", 0)
+    vcf_path = tmp_path / "contacts.vcf"
+    vcf_path.write_text("".join(CARDS[:1] * 200))
+    assert engine.vcf_skipped_share(vcf_path.read_bytes()) < engine.VCF_MMAP_MIN_SKIPPED_SHARE
+    vcf_path.write_text("".join(CARDS[1:2] * 200))
+    assert engine.vcf_skipped_share(vcf_path.read_bytes()) > engine.VCF_MMAP_MIN_SKIPPED_SHARE